@@ -70,8 +70,6 @@ apparently this is commonly accomplished with quoting?
 from typing import Generator
 from dataclasses import dataclass
 
-import pdb
-
 @dataclass
 class Id:
     value: str
@@ -93,90 +91,96 @@ ESCAPE_MAP = {
     "0": "\0",
 }
 
-whitespace = ' \r\n\t'
+whitespace = frozenset(' \r\n\t')
+# characters that end a bare identifier
+id_terminators = whitespace | frozenset('()')
 
 type Token = int|str|Id|LeftParen|RightParen
 def tokenize(src:str) -> Generator[Token]:
-    while len(src) > 0:
+    # scan by index instead of re-slicing src after every token (which copies the whole remainder each time)
+    pos = 0
+    n = len(src)
+    while pos < n:
         # whitespace and comments
-        if src[0] in whitespace:
-            src = src[1:]
+        if src[pos] in whitespace:
+            pos += 1
             continue
 
         # line comment
-        if src.startswith('//'):
-            i = 2
-            while i < len(src) and src[i] != '\n': i+=1
-            src = src[i:]
+        if src.startswith('//', pos):
+            i = src.find('\n', pos + 2)
+            pos = n if i == -1 else i
             continue
 
         # block comment (allowing nested comments)
-        if src.startswith('/*'):
+        if src.startswith('/*', pos):
             stack = 1
-            i = 2
-            while i < len(src) and stack > 0:
-                if src.startswith('/*'):
-                    i += 2
+            i = pos + 2
+            while stack > 0:
+                close = src.find('*/', i)
+                if close == -1:
+                    break
+                open_ = src.find('/*', i, close)
+                if open_ != -1:
                     stack += 1
-                elif src.startswith('*/'):
-                    i += 2
-                    stack -= 1
+                    i = open_ + 2
                 else:
-                    i += 1
+                    stack -= 1
+                    i = close + 2
             if stack != 0:
-                raise ValueError(f'Unclosed block comment. remaining=`{src}`')
-            src = src[i:]
+                raise ValueError(f'Unclosed block comment. remaining=`{src[pos:]}`')
+            pos = i
             continue
 
         # left/right parenthesis
-        if src[0] == '(':
-            src = src[1:]
+        if src[pos] == '(':
+            pos += 1
             yield left_paren
             continue
-        if src[0] == ')':
-            src = src[1:]
+        if src[pos] == ')':
+            pos += 1
             yield right_paren
             continue
 
         # integers
-        if src[0].isnumeric():
-            i = 1
-            while i < len(src) and src[i].isnumeric(): i+=1
-            yield int(src[:i])
-            src = src[i:]
+        if src[pos].isnumeric():
+            i = pos + 1
+            while i < n and src[i].isnumeric(): i+=1
+            yield int(src[pos:i])
+            pos = i
             continue
 
         # strings
-        if src[0] == '"' or src[0] == "'":
-            delim = src[0]
+        if src[pos] == '"' or src[pos] == "'":
+            delim = src[pos]
             s = ''
-            i = 1
-            while i < len(src):
+            i = pos + 1
+            while i < n:
                 if src[i] == delim:
                     i += 1
                     break
                 if src[i] == '\\':
                     i += 1
-                    if not i < len(src):
-                        raise ValueError(f'Unclosed string literal. remaining=`{src}`')
+                    if not i < n:
+                        raise ValueError(f'Unclosed string literal. remaining=`{src[pos:]}`')
                     # just insert the literal character escaped if not recognized
                     s += ESCAPE_MAP[src[i]] if src[i] in ESCAPE_MAP else src[i]
                 else:
                     s += src[i]
                 i += 1
             if src[i-1] != delim:
-                raise ValueError(f"Unclosed string literal. remaining=`{src}`")
+                raise ValueError(f"Unclosed string literal. remaining=`{src[pos:]}`")
             yield s
-            src = src[i:]
+            pos = i
             continue
 
         # everything else is recognized as an identifier
         # because we're lazy about delimiting identifiers, they can contain comments and strings
-        i = 0
-        while i < len(src) and src[i] not in whitespace and src[i] not in '()':
+        i = pos
+        while i < n and src[i] not in id_terminators:
             i += 1
-        yield Id(src[:i])
-        src = src[i:]
+        yield Id(src[pos:i])
+        pos = i
 
 
 # in general, shouldn't actually pre-parse. just evaluate immediately...
@@ -227,7 +231,6 @@ class Runtime:
         for expr in exprs:
             # TODO: eval the expr
             print(expr)
-        pdb.set_trace()
 
 
 
@@ -13,16 +13,14 @@ TBD problems to solve
     - e.g. quotes open the string context. inside of which braces can open a normal context, etc.
 """
 
-import numpy as np
+import re
+import operator
 from dataclasses import dataclass
-from abc import ABC, abstractmethod
-from typing import Callable, dataclass_transform, Literal, cast
+from abc import ABC, ABCMeta, abstractmethod
+from typing import Callable, Iterable, Iterator, dataclass_transform, Literal, cast
 from enum import Enum, auto
 
 
-import pdb
-
-
 type OperatorLiteral = Literal["^", "*", "/", "+", "-", ";"]
 type GroupLiteral = Literal["(", ")", "{", "}", "[", "]"]
 class Assoc(Enum):
@@ -36,15 +34,23 @@ class Assoc(Enum):
     postfix = auto()
 
 
+class SlotsDataclassMeta(ABCMeta):
+    """turn every subclass into a dataclass with __slots__ (no per-instance __dict__)"""
+    def __new__(mcls, name: str, bases: tuple[type, ...], namespace: dict, **kwargs):
+        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
+        if '__slots__' in namespace:
+            # root class, or the slotted copy that dataclass(slots=True) rebuilds through this metaclass
+            return cls
+        return dataclass(cls, repr=False, slots=True)
+
 @dataclass_transform()
-class Token(ABC):
+class Token(ABC, metaclass=SlotsDataclassMeta):
     """initialize a token subclass as a dataclass"""
-    def __init_subclass__(cls: 'type[Token]', **kwargs) -> None:
-        super().__init_subclass__(**kwargs)
-        dataclass(cls, repr=False)
+    __slots__ = ()
 
     def __repr__(self) -> str:
-        dict_str = ", ".join([f"{k}=`{v}`" for k, v in self.__dict__.items()])
+        # slotted dataclass: __slots__ is exactly the field names, no fields() introspection needed
+        dict_str = ", ".join(f"{name}=`{getattr(self, name)}`" for name in self.__slots__)
         return f"{self.__class__.__name__}({dict_str})"
 
 class NumberT(Token):
@@ -77,88 +83,94 @@ class WhitespaceT(Token):
 #     ...
 
 
-@dataclass
+# tokens are never mutated, so whitespace/operator/group tokens are shared instances
+whitespace_token = WhitespaceT()
+operator_tokens: dict[str, OperatorT] = {op: OperatorT(value=op) for op in "+-*/^;"}
+group_tokens: dict[str, GroupT] = {group: GroupT(value=group) for group in "({[]})"}
+
+# run-length scans are delegated to the C regex engine
+ws_re = re.compile(r"[ \t\n]+")
+number_re = re.compile(r"[0-9]+")
+line_comment_re = re.compile(r"%[^\n]*\n?")
+
+@dataclass(slots=True)
 class SourceBox:
     s: str
+    pos: int = 0
 
 def eat_line_comment(src:SourceBox) -> WhitespaceT|None:
-    if src.s.startswith("%"):
-        i = 0
-        while i < len(src.s) and src.s[i] != "\n":
-            i += 1
-        src.s = src.s[i+1:]
-        return WhitespaceT()
+    if m:=line_comment_re.match(src.s, src.pos):
+        src.pos = m.end()
+        return whitespace_token
     return None
 
 def eat_block_comment(src:SourceBox) -> WhitespaceT|None:
-    if src.s.startswith("%{"): # closes with }%
-        i = 2
+    if src.s.startswith("%{", src.pos): # closes with }%
+        # jump between delimiters with str.find rather than stepping one character at a time
+        i = src.pos + 2
         stack = 1
         while stack > 0:
-            if src.s[i:i+2] == "%{":
+            close = src.s.find("}%", i)
+            if close == -1:
+                raise ValueError(f"unterminated block comment. remaining: `{src.s[src.pos:]}`")
+            open_ = src.s.find("%{", i, close)
+            if open_ != -1:
                 stack += 1
-                i += 2
-            elif src.s[i:i+2] == "}%":
-                stack -= 1
-                i += 2
+                i = open_ + 2
             else:
-                i += 1
-        src.s = src.s[i:]
-        return WhitespaceT()
+                stack -= 1
+                i = close + 2
+        src.pos = i
+        return whitespace_token
     return None
 
 def eat_whitespace(src:SourceBox) -> WhitespaceT|None:
-    i = 0
-    while i < len(src.s) and src.s[i] in " \t\n":
-        i += 1
-    if i > 0:
-        src.s = src.s[i:]
-        return WhitespaceT()
+    if m:=ws_re.match(src.s, src.pos):
+        src.pos = m.end()
+        return whitespace_token
     return None
 
 def eat_number(src:SourceBox) -> NumberT|None:
-    if src.s[0] in "0123456789":
-        i = 0
-        while i < len(src.s) and src.s[i] in "0123456789":
-            i += 1
-        num = src.s[:i]
-        src.s = src.s[i:]
-        return NumberT(value=int(num))
+    if m:=number_re.match(src.s, src.pos):
+        src.pos = m.end()
+        return NumberT(value=int(m.group()))
     return None
 
 def eat_operator(src:SourceBox) -> OperatorT|None:
-    if src.s[0] in "+-*/^;":
-        op = src.s[0]
-        src.s = src.s[1:]
-        return OperatorT(value=op)
+    if tok:=operator_tokens.get(src.s[src.pos]):
+        src.pos += 1
+        return tok
     return None
 
 def eat_group(src:SourceBox) -> GroupT|None:
-    if src.s[0] in "({[]})":
-        group = src.s[0]
-        src.s = src.s[1:]
-        return GroupT(value=group)
+    if tok:=group_tokens.get(src.s[src.pos]):
+        src.pos += 1
+        return tok
     return None
 
-eat_fns = [
-    eat_whitespace,
-    eat_number,
-    eat_operator,
-    eat_group,
-]
-def tokenize(raw_src:str) -> list[Token]:
-    src = SourceBox(s=raw_src)
-    tokens = []
+# eat functions keyed by the characters a token of theirs can start with
+eat_fns: dict[str, Callable[[SourceBox], Token|None]] = {
+    " \t\n": eat_whitespace,
+    "0123456789": eat_number,
+    "+-*/^;": eat_operator,
+    "({[]})": eat_group,
+}
+# first character (ascii only) -> the one eat function that could match there
+eat_dispatch: tuple[Callable[[SourceBox], Token|None]|None, ...] = tuple(
+    next((fn for chars, fn in eat_fns.items() if chr(c) in chars), None) for c in range(128)
+)
 
-    while len(src.s) > 0:
-        for eat_fn in eat_fns:
-            if tok:=eat_fn(src):
-                tokens.append(tok)
-                break
-        else:
-            raise ValueError(f"unknown token: `{src.s[0]}`. remaining: `{src.s}`")
+def tokenize(raw_src:str, skip_whitespace:bool=True) -> Iterator[Token]:
+    src = SourceBox(s=raw_src)
 
-    return tokens
+    while src.pos < len(src.s):
+        c = ord(src.s[src.pos])
+        eat_fn = eat_dispatch[c] if c < 128 else None
+        if eat_fn is None or not (tok:=eat_fn(src)):
+            raise ValueError(f"unknown token: `{src.s[src.pos]}`. remaining: `{src.s[src.pos:]}`")
+        if skip_whitespace and tok is whitespace_token:
+            continue
+        yield tok
 
 
 
@@ -178,38 +190,31 @@ postfixes: set[OperatorLiteral] = {op for row in optable for op, assoc in row if
 
 BASE_BIND_POWER = 1   #TBD, but 0 probably for groups ()
 NO_BIND = -1
-def left_bp(i: int) -> tuple[int, int]:
-    return (BASE_BIND_POWER+2*i, BASE_BIND_POWER+2*i+1)
-def right_bp(i: int) -> tuple[int, int]:
-    return (BASE_BIND_POWER+2*i+1, BASE_BIND_POWER+2*i)
-def prefix_bp(i: int) -> tuple[int, int]:
-    return (BASE_BIND_POWER+2*i, NO_BIND)
-def postfix_bp(i: int) -> tuple[int, int]:
-    return (NO_BIND, BASE_BIND_POWER+2*i)
-def none_bp(i: int) -> tuple[int, int]:
-    return (NO_BIND, NO_BIND)
-
-bp_funcs: dict[Assoc, Callable[[int], tuple[int, int]]] = {
-    Assoc.left: left_bp,
-    Assoc.right: right_bp,
-    Assoc.prefix: prefix_bp,
-    Assoc.postfix: postfix_bp,
-    Assoc.none: none_bp,
+# offsets from BASE_BIND_POWER+2*i for the (left, right) binding powers of each associativity. None means no binding
+bp_offsets: dict[Assoc, tuple[int|None, int|None]] = {
+    Assoc.left: (0, 1),
+    Assoc.right: (1, 0),
+    Assoc.prefix: (0, None),
+    Assoc.postfix: (None, 0),
+    Assoc.none: (None, None),
 }
 
 # build the pratt binding power table
 bindpow: dict[OperatorLiteral, tuple[int, int]] = {
-    op: bp_funcs[assoc](i)
+    op: cast(tuple[int, int], tuple(NO_BIND if o is None else BASE_BIND_POWER+2*i+o for o in bp_offsets[assoc]))
     for i, row in enumerate(reversed(optable))
         for op, assoc in row
 }
 
+# same table indexed by ord(op) so the parser's hot loop skips string hashing (operators are all ascii)
+bindpow_by_ord: tuple[tuple[int, int], ...] = tuple(
+    bindpow.get(chr(c), (NO_BIND, NO_BIND)) for c in range(128)  # type: ignore[call-overload]
+)
+
 
 @dataclass_transform()
-class AST(ABC):
-    def __init_subclass__(cls: 'type[AST]', **kwargs) -> None:
-        super().__init_subclass__(**kwargs)
-        dataclass(cls, repr=False)
+class AST(ABC, metaclass=SlotsDataclassMeta):
+    __slots__ = ()
 
     @abstractmethod
     def eval(self) -> int|float: ...
@@ -238,7 +243,6 @@ class EmptyGroup(AST):
     def __repr__(self): return '()'
     def eval(self): return ()
 
-@dataclass
 class BinOp(AST):
     left: AST
     op: OperatorT
@@ -248,176 +252,101 @@ class BinOp(AST):
         return f"({self.op} {self.left} {self.right})"
 
     def eval(self) -> int|float:
-        left = self.left.eval()
-        right = self.right.eval()
-        op = self.op.value
-        if op == "^":
-            return left ** right
-        elif op == "*":
-            return left * right
-        elif op == "/":
-            return left / right
-        elif op == "+":
-            return left + right
-        elif op == "-":
-            return left - right
-        else:
-            raise ValueError(f"unknown operator: '{op}'. {self=}")
-
-@dataclass
+        try:
+            fn = binop_funcs[self.op.value]
+        except KeyError:
+            raise ValueError(f"unknown operator: '{self.op.value}'. {self=}") from None
+        return fn(self.left.eval(), self.right.eval())
+
+binop_funcs: dict[OperatorLiteral, Callable[[int|float, int|float], int|float]] = {
+    "^": operator.pow,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "+": operator.add,
+    "-": operator.sub,
+}
+
 class PrefixOp(AST):
     def eval(self): raise NotImplementedError
-@dataclass
 class PostfixOp(AST):
     def eval(self): raise NotImplementedError
 
 
-def reduce_ops(tokens: list[Token|AST]) -> int:
-    ast_idxs = [i for i, t in enumerate(tokens) if isinstance(t, AST)]
-    if len(ast_idxs) == 0:
-        return 0
-
-    # for every AST, get the right_bp of the left thing, and the left_bp of the right thing
-    adjacent_bps = []
-    for idx in ast_idxs:
-        left_t = tokens[idx-1] if idx-1>=0 else None
-        right_t = tokens[idx+1] if idx+1<len(tokens) else None
-        left_bp = -1
-        right_bp = -1
-        if left_t is not None and isinstance(left_t, OperatorT):
-            _, left_bp = bindpow[left_t.value]
-        if right_t is not None and isinstance(right_t, OperatorT):
-            right_bp, _ = bindpow[right_t.value]
-        adjacent_bps.append((left_bp, right_bp))
-
-    adjacent_bps = np.array(adjacent_bps)
-    diffs = np.diff(adjacent_bps)
-    shift_mask = np.any(adjacent_bps > 0, axis=1) * (diffs != 0)[:,0]
-    shift_dirs = np.sign(diffs)[:,0]
-
-
-    shift_to = ast_idxs + shift_dirs
-
-    # apply all the reductions
-    reductions_applied = 0
-    i = len(ast_idxs) - 1
-    while i >= 0:
-        if not shift_mask[i]:
-            i -= 1
-            continue
-        idx = ast_idxs[i]
-        ast = tokens[idx]
-        assert isinstance(ast, AST), f"INTERNAL ERROR: expected ast to be an AST. got {ast}"
-        target = shift_to[i]
-        target_tok = tokens[target]
-        assert isinstance(target_tok, (OperatorT)), f"INTERNAL ERROR: expected operator at target. got {tokens[target]}"  # (BinOp, PrefixOp, PostfixOp)
-        if target_tok.value in binops:
-            if idx < target:
-                # right item was not ready yet
-                i-=1
-                continue
-            elif idx > target:
-                if i-1 < 0 or shift_to[i-1] != target:
-                    # left item not ready or captured by the binop
-                    i-=1
-                    continue
-                tokens[target-1:target+2] = [BinOp(*tokens[target-1:target+2])]
-                i-=2
-                reductions_applied += 1
-                continue
-            else:
-                raise ValueError(f"INTERNAL ERROR: expected ast target idx to be different from ast's own idx. both are `{idx}`")
-        else:
-            raise NotImplementedError(f'need to handle non-binops. current was {ast=}, {target_tok=}')
-
-
-    return reductions_applied
-
-def make_groups(tokens: list[Token|AST]) -> int:
-    reductions_applied = 0
-    group_idxs = [i for i, t in enumerate(tokens) if isinstance(t, GroupT)]
-    i = len(group_idxs) - 1
-    while i >= 1:
-        left_idx = group_idxs[i-1]
-        right_idx = group_idxs[i]
-        # all items between left and right should be ASTs
-        if any(not isinstance(t, AST) for t in tokens[left_idx+1:right_idx]):
-            # interior not fully reduced
-            i -= 1
-            continue
-        left_t = tokens[left_idx]
-        try:
-            right_t = tokens[right_idx]
-        except:
-            pdb.set_trace()
-            ...
-        assert isinstance(left_t, GroupT), f'INTERNAL ERROR: left_t should be a GroupT. got {left_t}'
-        assert isinstance(right_t, GroupT), f'INTERNAL ERROR: right_t should be a GroupT. got {right_t}'
-
-        if left_t.value not in group_matchers:
-            i -= 1
-            continue
-            # raise ValueError(f'INTERNAL ERROR: GroupT token not in  group_matchers (i.e. need to expand it... {left_t.value=}')
-        if right_t.value not in group_matchers[left_t.value]:
-            # left and right are not a match
-            i -= 1
-            continue
-
-        # left and rigth match, and interior fully match!
-        # TODO: need to actually select the group type based on the left/right tokens
-        # (..)|[..]|[..)|(..]: range (i.e. delims with a single bare range AST inside)
-        # (): Group
-        # []: list
-        # {}: scope
-        # <>: typeparams
-        if right_idx - left_idx > 2:
-            reductions_applied += 1
-            tokens[left_idx:right_idx+1] = [SeqGroup(tokens[left_idx+1:right_idx])]
-            i -= 2
-        elif right_idx - left_idx == 2:
-            reductions_applied += 1
-            tokens[left_idx:right_idx+1] = [Group(tokens[left_idx+1])]
-            i -= 2
-        elif right_idx - left_idx == 1:
-            reductions_applied += 1
-            tokens[left_idx:right_idx+1] = [EmptyGroup()]
-            i -= 2
-        else:
-            raise ValueError(f"left and right group index don't make sense... {tokens[left_idx:right_idx+1]=}")
-
-    return reductions_applied
-
-def shunt_tokens(tokens: list[Token]) -> list[AST]:
-    tokens: list[Token|AST] = cast(list[Token|AST], tokens)
-    for i, t in enumerate(tokens):
-        if isinstance(t, NumberT):
-            tokens[i] = Atom(t.value)
-
-    # TODO: probably just redo this as imperative loop (i.e. remove vectorization)
+def parse_group(tokens: list[Token], i: int) -> tuple[AST, int]:
+    """parse the group opened at tokens[i]. returns the group and the index just past its closing delimiter"""
+    opener = tokens[i]
+    assert isinstance(opener, GroupT), f"INTERNAL ERROR: expected group opener. got {opener}"
+    if opener.value not in group_matchers:
+        raise ValueError(f"token shunting failed. unexpected closing group `{opener}` at {i=}. {tokens=}")
+    i += 1
+    items: list[AST] = []
     while True:
-        init_len = len(tokens)
-        reductions_applied = reduce_ops(tokens)
-        if reductions_applied == 0:
-            reductions_applied += make_groups(tokens)
-        # if reductions_applied == 0:
-        #     reductions_applied += make_flows(tokens)
-        # if reductions_applied == 0:
-        #     break
-        if len(tokens) == init_len:
-            # no reductions applied by anything
+        if i >= len(tokens):
+            raise ValueError(f"token shunting failed. unclosed group `{opener}`. {tokens=}")
+        t = tokens[i]
+        if isinstance(t, GroupT) and t.value not in group_matchers:
+            break
+        item, i = parse_expr(tokens, i, 0)
+        items.append(item)
+
+    closer = tokens[i]
+    if closer.value not in group_matchers[opener.value]:
+        raise ValueError(f"token shunting failed. group `{opener}` closed by mismatched `{closer}`. {tokens=}")
+
+    # TODO: need to actually select the group type based on the left/right tokens
+    # (..)|[..]|[..)|(..]: range (i.e. delims with a single bare range AST inside)
+    # (): Group
+    # []: list
+    # {}: scope
+    # <>: typeparams
+    if len(items) == 0:
+        return EmptyGroup(), i+1
+    if len(items) == 1:
+        return Group(items[0]), i+1
+    return SeqGroup(items), i+1
+
+def parse_expr(tokens: list[Token], i: int, min_bp: int) -> tuple[AST, int]:
+    """pratt parse a single expression starting at tokens[i], only continuing through operators that bind at least min_bp"""
+    if i >= len(tokens):
+        raise ValueError(f"token shunting failed. expected an expression at end of input. {tokens=}")
+    t = tokens[i]
+    if isinstance(t, NumberT):
+        lhs, i = Atom(t.value), i+1
+    elif isinstance(t, GroupT):
+        lhs, i = parse_group(tokens, i)
+    else:
+        # TODO: prefix operators
+        raise ValueError(f"token shunting failed. unexpected `{t}` at {i=}. {tokens=}")
+
+    while i < len(tokens):
+        op = tokens[i]
+        if not isinstance(op, OperatorT):
+            # juxtaposed expressions/group close. leave for the caller
             break
+        if op.value not in binops:
+            # TODO: postfix operators
+            raise ValueError(f"token shunting failed. unsupported operator `{op}` at {i=}. {tokens=}")
+        lbp, rbp = bindpow_by_ord[ord(op.value)]
+        if lbp < min_bp:
+            break
+        rhs, i = parse_expr(tokens, i+1, rbp)
+        lhs = BinOp(lhs, op, rhs)
 
-    if not all(isinstance(t, AST) for t in tokens):
-        raise ValueError(f"token shunting failed. {tokens=}")
+    return lhs, i
 
-    return tokens
+def shunt_tokens(tokens: list[Token]) -> list[AST]:
+    exprs: list[AST] = []
+    i = 0
+    while i < len(tokens):
+        expr, i = parse_expr(tokens, i, 0)
+        exprs.append(expr)
+    return exprs
 
 
-def parse(tokens: list[Token]) -> list[AST]:
+def parse(tokens: Iterable[Token]) -> list[AST]:
     # TODO: other post-tokenization passes (e.g. juxtapose, opchains, etc.)
-    # filter whitespace
-    tokens = [t for t in tokens if not isinstance(t, WhitespaceT)]
-    return shunt_tokens(tokens)
+    # whitespace is already dropped by tokenize. shunting needs random access, so drain the stream
+    return shunt_tokens(list(tokens))
 
 if __name__ == "__main__":
 
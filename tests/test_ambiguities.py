@@ -199,6 +199,17 @@ class TestPrecedence:
         assert isinstance(result.right.right, Pow)
         assert result.right.right.left.value == "3"
         assert result.right.right.right.value == "4"
+    
+    def test_priority_follows_in_place_edits(self):
+        """Editing DisambiguationRules.priority in place should change the scores."""
+        from turtles.gll import DisambiguationRules
+        
+        rules = DisambiguationRules(priority=['B', 'A'])
+        assert rules.get_priority('A') == -1
+        rules.priority[0] = 'A'
+        rules.priority[1] = 'B'
+        assert rules.get_priority('A') == 0
+        assert rules.get_priority('B') == -1
 
 
 # =============================================================================
@@ -381,6 +392,24 @@ class TestLongestMatch:
         assert result.greeting.word == "hello"
         assert result.rest == " world"
     
+    def test_longest_match_set_after_first_parse(self):
+        """Setting longest_match after a parse should apply to the next parse."""
+        class Greet(Rule):
+            word: repeat[char['a-z'], at_least[1]]
+        
+        class Sent(Rule):
+            greet: Greet
+            rest: repeat[char['a-z ']]
+        
+        result = Sent("hello world")
+        assert result._text == "hello world"
+        
+        Greet.longest_match = True
+        for _ in range(3):
+            result = Sent("hello world")
+            assert result.greet.word == "hello"
+            assert result.rest == " world"
+    
     def test_multiple_separators(self):
         """Test with multiple record separators in sequence."""
         class CRLF3(Rule):
@@ -150,6 +150,14 @@ class TestRepetition:
         result = Digits("123")
         assert result.value == "123"
     
+    def test_long_run(self):
+        """A run far longer than the recursion limit should parse and hydrate."""
+        class LongDigits(Rule):
+            value: repeat[char['0-9'], at_least[1]]
+        
+        result = LongDigits("7" * 5000)
+        assert result.value == "7" * 5000
+    
     def test_at_most(self):
         class Limited(Rule):
             value: repeat[char['a-z'], at_most[3]]  # noqa
@@ -265,6 +273,22 @@ class TestChoice:
         id_result = UnionValue("abc")
         assert isinstance(id_result, UnionId)
     
+    def test_parse_many(self):
+        class ManyNum(Rule):
+            digits: repeat[char['0-9'], at_least[1]]
+        
+        class ManyId(Rule):
+            letters: repeat[char['a-z'], at_least[1]]
+        
+        ManyValue = ManyNum | ManyId
+        
+        nums = list(ManyNum.parse_many(["1", "23", "456"]))
+        assert [n.digits for n in nums] == ["1", "23", "456"]
+        
+        values = list(ManyValue.parse_many(["123", "abc", "7"]))
+        assert [type(v) for v in values] == [ManyNum, ManyId, ManyNum]
+        assert values[1].letters == "abc"
+    
     def test_anonymous_choice(self):
         class Sign(Rule):
             char['+-']
@@ -776,6 +800,15 @@ class TestEdgeCases:
         
         result = OuterN("([hello])")
         assert result.middle.inner.value == "hello"
+    
+    def test_predefined_sequence_skips_class_body(self):
+        """A class that supplies its own _sequence is built from it, not from its body."""
+        class Predefined(Rule):
+            _sequence = [("expr", "ok")]
+            'ignored'
+        
+        result = Predefined("ok")
+        assert result._text == "ok"
 
 
 # =============================================================================
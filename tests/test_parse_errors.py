@@ -106,6 +106,36 @@ class TestChoiceErrors:
         error_str = str(exc_info.value)
         # Should mention some alternatives
         assert "if" in error_str or "else" in error_str or "expected" in error_str.lower()
+
+    @pytest.mark.parametrize("text, position, expected", [
+        ("x=nope;", 2, ['"false"', '"null"', '"true"']),
+        ("x=nul;", 2, ['"false"', '"null"', '"true"']),
+        ("x=", 2, ['"false"', '"null"', '"true"']),
+        ("x=true!", 6, ['";"']),
+    ])
+    def test_choice_of_literals_part_way(self, monkeypatch, text, position, expected):
+        """
+        An all-literal choice failing mid-input lists every alternative, including the ones
+        skipped by the first-character index, exactly as trying each alternative would.
+        """
+        from turtles.gll import CompiledGrammar
+        
+        class Assign(Rule):
+            "x="
+            value: either[r"true", r"false", r"null"]
+            ";"
+        
+        with pytest.raises(ParseError) as exc_info:
+            Assign(text)
+        indexed = exc_info.value
+        assert indexed.failure_info.position == position
+        assert sorted(e.description for e in indexed.failure_info.expected) == expected
+        
+        # Parse again without the first-character index: the reported error should be identical
+        monkeypatch.setattr(CompiledGrammar, 'literal_choice_index', lambda self, choice: None)
+        with pytest.raises(ParseError) as exc_info:
+            Assign(text)
+        assert str(exc_info.value) == str(indexed)
     
     def test_choice_of_rules(self):
         """Test error with rule alternatives."""
@@ -127,6 +157,96 @@ class TestChoiceErrors:
         assert error.failure_info is not None
 
 
+@pytest.fixture
+def greeting_or_pair(monkeypatch):
+    """
+    A union whose second alternative calls another union behind the furthest failure:
+    Greeting reads past the space first, so Pair's Atoms are called at earlier positions.
+    Returns the grammar and a list that collects every alternative FIRST-set pruning skips.
+    """
+    from turtles.gll import GLLParser
+    
+    class Word(Rule):
+        letters: repeat[char['a-z'], at_least[1]]
+    
+    class Num(Rule):
+        digits: repeat[char['0-9'], at_least[1]]
+    
+    class Sym(Rule):
+        '@'
+        name: Word
+    
+    Atom = Word | Num | Sym
+    
+    class Pair(Rule):
+        first: Atom
+        ' '
+        second: Atom
+        ';'
+    
+    class Greeting(Rule):
+        "hello "
+        name: Word
+        "!"
+    
+    Line = Pair | Greeting
+    
+    skipped: list[tuple[str, int]] = []
+    can_start = GLLParser._can_start
+    
+    def recording_can_start(self, rule_name, pos):
+        result = can_start(self, rule_name, pos)
+        if not result:
+            skipped.append((rule_name, pos))
+        return result
+    
+    monkeypatch.setattr(GLLParser, '_can_start', recording_can_start)
+    return {'Line': Line, 'Pair': Pair, 'Word': Word, 'Num': Num, 'skipped': skipped}
+
+
+class TestFirstSetPruning:
+    """Alternatives that can't start at a position behind the furthest failure are skipped."""
+    
+    def test_parse_result_unchanged(self, greeting_or_pair):
+        """Pruned alternatives don't affect which alternative is parsed."""
+        g = greeting_or_pair
+        
+        result = g['Line']("hello abc;")
+        assert isinstance(result, g['Pair'])
+        assert isinstance(result.first, g['Word'])
+        assert isinstance(result.second, g['Word'])
+        assert result.second.letters == "abc"
+        # Num and Sym can't start with a letter, so they were never called
+        assert ('Num', 6) in g['skipped']
+        assert ('Sym', 6) in g['skipped']
+        
+        result = g['Line']("hello 12;")
+        assert isinstance(result.second, g['Num'])
+    
+    @pytest.mark.parametrize("text, position, expected", [
+        ("hello abc?", 9, ['"!"', '";"']),
+        ("hello 12?", 8, ['";"']),
+        ("hello ?", 6, ['"@"', '[0-9]', '[a-z]']),
+    ])
+    def test_errors_match_unpruned_parse(self, greeting_or_pair, monkeypatch, text, position, expected):
+        """Errors are the same as when every alternative is called."""
+        from turtles.gll import GLLParser
+        
+        g = greeting_or_pair
+        with pytest.raises(ParseError) as exc_info:
+            g['Line'](text)
+        assert g['skipped']
+        pruned = exc_info.value
+        assert pruned.failure_info.position == position
+        assert sorted(e.description for e in pruned.failure_info.expected) == expected
+        
+        # Parse again with pruning disabled: the reported error should be identical
+        monkeypatch.setattr(GLLParser, '_can_start', lambda self, rule_name, pos: True)
+        with pytest.raises(ParseError) as exc_info:
+            g['Line'](text)
+        assert str(exc_info.value) == str(pruned)
+
+
 class TestRepeatErrors:
     """Test error messages for repeat constraints."""
     
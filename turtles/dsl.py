@@ -27,12 +27,18 @@ from typing import final, overload, TYPE_CHECKING, Union
 from abc import ABC, ABCMeta
 import inspect
 import ast
+import linecache
+import os
+import sys
+import weakref
 
-from .grammar import register_rule, _build_grammar
+from .grammar import register_rule, registry_version, _build_grammar
 
 if TYPE_CHECKING:
     from .grammar import GrammarRule
-    from .gll import ParseTree, CompiledGrammar
+    from collections.abc import Iterable, Iterator
+    from types import CodeType, FrameType
+    from .gll import ParseTree, CompiledGrammar, DisambiguationRules, GLLParser
 
 
 class SourceNotAvailableError(Exception):
@@ -43,8 +49,22 @@ class SourceNotAvailableError(Exception):
 _TURTLES_PACKAGE_DIR = Path(__file__).resolve().parent
 _TURTLES_EXAMPLE_DIR = _TURTLES_PACKAGE_DIR / "examples"
 
+# Source files of the turtles package itself (examples excluded), both as resolved
+# and as spelled by this module's __file__, so frame checks can skip path resolution
+_TURTLES_CORE_FILES = frozenset(
+    path
+    for py_file in _TURTLES_PACKAGE_DIR.rglob("*.py")
+    if not py_file.is_relative_to(_TURTLES_EXAMPLE_DIR)
+    for path in (
+        str(py_file),
+        os.path.join(os.path.dirname(__file__), str(py_file.relative_to(_TURTLES_PACKAGE_DIR))),
+    )
+)
+
 
 def _is_turtles_core_internal_frame(filename: str) -> bool:
+    if filename in _TURTLES_CORE_FILES:
+        return True
     if not filename or filename.startswith("<"):
         return False
     try:
@@ -56,6 +76,24 @@ def _is_turtles_core_internal_frame(filename: str) -> bool:
         return False
 
 
+# Whether frames from a source file are internal (turtles, importlib or frozen modules)
+# Maps code.co_filename to is_internal, so it stays bounded by the number of files seen
+_internal_file_cache: dict[str, bool] = {}
+
+
+def _is_internal_code(code: 'CodeType') -> bool:
+    """Whether frames running `code` should be skipped when looking for user code."""
+    filename = code.co_filename
+    internal = _internal_file_cache.get(filename)
+    if internal is None:
+        internal = _internal_file_cache[filename] = (
+            _is_turtles_core_internal_frame(filename)
+            or 'importlib' in filename
+            or filename.startswith('<frozen')
+        )
+    return internal
+
+
 def _get_user_frame() -> tuple[str, int]:
     """
     Find the first frame that represents user code (not turtles internals or importlib).
@@ -66,26 +104,14 @@ def _get_user_frame() -> tuple[str, int]:
     - Not part of importlib
     - Not a frozen module
     """
-    frame = inspect.currentframe()
-    try:
-        while frame is not None:
-            filename = frame.f_code.co_filename
-            lineno = frame.f_lineno
-            
-            # Skip frames from within the turtles package itself
-            if _is_turtles_core_internal_frame(filename):
-                frame = frame.f_back
-                continue
-            # Skip importlib internals and frozen modules
-            if 'importlib' in filename or filename.startswith('<frozen'):
-                frame = frame.f_back
-                continue
-            
-            # Found user code
-            return filename, lineno
+    frame = sys._getframe(1)
+    # Skip frames from the turtles package itself, importlib internals and frozen modules
+    while frame is not None and _is_internal_code(frame.f_code):
+        frame = frame.f_back
+    if frame is None:
         return "", 0
-    finally:
-        del frame
+    # Found user code
+    return frame.f_code.co_filename, frame.f_lineno
 
 
 def _check_not_in_repl(operation: str) -> None:
@@ -110,35 +136,190 @@ def _check_not_in_repl(operation: str) -> None:
         )
 
 
-_all_rule_unions: list['RuleUnion'] = []
+# RuleUnion objects not yet registered under a name, keyed by creation serial (so in creation order)
+# Held weakly: an unnamed union nothing refers to (like the A | B inside A | B | C) can never be
+# found by name, and an empty map lets the auto-registration scans return immediately
+_unregistered_unions: weakref.WeakValueDictionary[int, 'RuleUnion'] = weakref.WeakValueDictionary()
+# Number of RuleUnion objects created so far
+_rule_union_count = 0
 
 # Cache of local scopes captured at rule/union definition time
 # Maps frame identity (file, function name, line) to locals snapshot
 _captured_locals: dict[tuple[str, str, int], dict[str, object]] = {}
 
 
-def _capture_caller_locals() -> None:
+# Cache of parsed source files, shared by every Rule subclass defined in the same file
+# Maps source file path to (mtime_ns, module AST, class index); the source text itself is not kept
+_source_cache: dict[str, tuple[int, ast.Module, '_ClassIndex']] = {}
+
+
+def _get_module_ast(source_file: str, mtime: int | None = None) -> tuple[ast.Module, '_ClassIndex']:
+    """
+    Return (module_ast, class_index) for a source file, parsing it at most once.
+    The cached entry is invalidated if the file's mtime changes.
+    """
+    if mtime is None:
+        mtime = os.stat(source_file).st_mtime_ns
+    cached = _source_cache.get(source_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    # inspect has usually already loaded this file into linecache, so reuse its copy
+    # instead of reading the file again
+    linecache.checkcache(source_file)
+    lines = linecache.getlines(source_file)
+    if lines:
+        file_source = "".join(lines)
+    else:
+        with open(source_file, "r") as fh:
+            file_source = fh.read()
+    module_ast = ast.parse(file_source)
+    class_index = _build_class_index(module_ast)
+    _source_cache[source_file] = (mtime, module_ast, class_index)
+    return module_ast, class_index
+
+
+# Cache of collected class-body sequences
+# Maps (source file, class qualname, first line, file mtime_ns) to the sequence
+_sequence_cache: dict[tuple[str, str, int, int], tuple] = {}
+
+
+# Canonical instance of each distinct class-body sequence (sequences are immutable tuples)
+_interned_sequences: dict[tuple, tuple] = {}
+
+
+# Statement fields that can contain nested statements (class/function bodies, if/else, try, match, ...)
+_NESTED_BODY_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+# Index of the class definitions in a module:
+# (name, first line) -> ClassDef, and name -> first ClassDef with that name
+type _ClassIndex = tuple[dict[tuple[str, int], ast.ClassDef], dict[str, ast.ClassDef]]
+
+
+def _iter_classdefs(body: list) -> 'Iterator[ast.ClassDef]':
+    """
+    Yield every ClassDef in a list of statements, in source order.
+    Only statement bodies are searched; expressions are never visited.
+    """
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            yield node
+        for field in _NESTED_BODY_FIELDS:
+            nested = getattr(node, field, None)
+            if nested:
+                yield from _iter_classdefs(nested)
+
+
+def _build_class_index(module_ast: ast.Module) -> _ClassIndex:
+    """Index every class definition in a module so each Rule subclass lookup is O(1)."""
+    by_location: dict[tuple[str, int], ast.ClassDef] = {}
+    by_name: dict[str, ast.ClassDef] = {}
+    for node in _iter_classdefs(module_ast.body):
+        by_location[(node.name, node.lineno)] = node
+        by_name.setdefault(node.name, node)
+    return by_location, by_name
+
+
+def _find_classdef(class_index: _ClassIndex, name: str, lineno: int) -> ast.ClassDef | None:
+    """Find the ClassDef for a class by name and first line, falling back to the first class with that name."""
+    by_location, by_name = class_index
+    node = by_location.get((name, lineno))
+    if node is None:
+        node = by_name.get(name)
+    return node
+
+
+def _find_caller_frame() -> 'FrameType | None':
+    """Return the first frame on the stack outside the turtles package (examples count as user code)."""
+    caller = sys._getframe(1)
+    while caller and _is_turtles_core_internal_frame(caller.f_code.co_filename):
+        caller = caller.f_back
+    return caller
+
+
+# inspect.getsourcefile results keyed by the defining file, which every class in a module shares
+_source_file_cache: dict[str, str | None] = {}
+
+
+def _get_source_file(cls: type) -> str | None:
+    """inspect.getsourcefile for a class, resolved once per defining file."""
+    filename = inspect.getfile(cls)
+    try:
+        return _source_file_cache[filename]
+    except KeyError:
+        source_file = _source_file_cache[filename] = inspect.getsourcefile(cls)
+        return source_file
+
+
+def _class_first_lineno(cls: type) -> int:
+    """
+    First line of a class definition.
+    Uses __firstlineno__ (Python 3.13+) when the class has one, avoiding inspect's
+    re-scan of the source; otherwise falls back to inspect.getsourcelines.
+    """
+    lineno = cls.__dict__.get('__firstlineno__')
+    if lineno is not None:
+        return lineno
+    _, lineno = inspect.getsourcelines(cls)
+    return lineno
+
+
+def _sequence_item_for_expr(stmt: ast.Expr) -> tuple | None:
+    """Sequence item for a bare expression statement in a Rule class body."""
+    value = stmt.value
+    # capture bare string expressions (including the leading docstring if used that way)
+    if type(value) is ast.Constant and isinstance(value.value, str):
+        return ("expr", value.value)
+
+    # capture other bare expressions (e.g., char['+-'], sequence[...], etc.)
+    try:
+        expr_text = ast.unparse(value)
+    except Exception:
+        return None
+    # Store as anonymous declaration (no name, just the expression)
+    return ("decl", None, expr_text)
+
+
+def _sequence_item_for_annassign(stmt: ast.AnnAssign) -> tuple:
+    """Sequence item for a variable annotation (a:int, b:str, etc.) in a Rule class body."""
+    var_name = stmt.target.id if type(stmt.target) is ast.Name else None
+    # reconstruct the annotation text from the node (no need to slice the file source)
+    try:
+        annotation_text = ast.unparse(stmt.annotation)
+    except Exception:
+        annotation_text = None
+    return ("decl", var_name, annotation_text)
+
+
+# Class-body statement types that contribute to a Rule's sequence, keyed by exact node type
+_SEQUENCE_STMT_HANDLERS = {
+    ast.Expr: _sequence_item_for_expr,
+    ast.AnnAssign: _sequence_item_for_annassign,
+}
+
+
+def _capture_caller_locals(caller: 'FrameType | None' = None) -> None:
     """
     Capture a snapshot of the caller's locals.
     This allows rules defined inside functions to be discovered later.
+    
+    Args:
+        caller: The user frame to capture, if the caller has already located it
     """
-    frame = inspect.currentframe()
-    try:
-        # Walk up to find the first frame outside the turtles package
-        caller = frame.f_back
-        while caller:
-            filename = caller.f_code.co_filename
-            if not _is_turtles_core_internal_frame(filename):
-                break
-            caller = caller.f_back
-        
-        if caller:
-            # Use (filename, function name, first line) as key for deduplication
-            key = (caller.f_code.co_filename, caller.f_code.co_name, caller.f_code.co_firstlineno)
-            # Update the snapshot (later captures override earlier, which is what we want)
-            _captured_locals[key] = dict(caller.f_locals)
-    finally:
-        del frame
+    if caller is None:
+        caller = _find_caller_frame()
+    
+    if caller:
+        # Use (filename, function name, first line) as key for deduplication
+        key = (caller.f_code.co_filename, caller.f_code.co_name, caller.f_code.co_firstlineno)
+        # Update the snapshot (later captures override earlier, which is what we want)
+        f_locals = caller.f_locals
+        if f_locals is caller.f_globals:
+            # Module scope: the namespace is the module's own long-lived dict, so keep a
+            # reference instead of copying every global once per rule defined in the module
+            _captured_locals[key] = f_locals
+        else:
+            _captured_locals[key] = dict(f_locals)
 
 
 def _get_all_captured_vars() -> dict[str, object]:
@@ -146,33 +327,33 @@ def _get_all_captured_vars() -> dict[str, object]:
     Get all variables from captured local scopes plus caller's current scope.
     Returns a dict with all discovered variables (later captures override earlier).
     """
-    result: dict[str, object] = {}
-    
     # First, include all previously captured locals
-    for locals_snapshot in _captured_locals.values():
-        result.update(locals_snapshot)
+    layers: list = list(_captured_locals.values())
     
     # Then, walk the current call stack to find current locals
-    frame = inspect.currentframe()
-    try:
-        caller = frame.f_back
-        while caller:
-            filename = caller.f_code.co_filename
-            # Skip turtles internals and Python/importlib internals
-            if (
-                not _is_turtles_core_internal_frame(filename)
-                and 'importlib' not in filename
-                and not filename.startswith('<frozen')
-            ):
-                result.update(caller.f_locals)
-                result.update(caller.f_globals)
-            caller = caller.f_back
-    finally:
-        del frame
+    caller = sys._getframe(1)
+    while caller:
+        # Skip turtles internals and Python/importlib internals
+        if not _is_internal_code(caller.f_code):
+            layers.append(caller.f_locals)
+            layers.append(caller.f_globals)
+        caller = caller.f_back
+    
+    # Every frame running in a module shares that module's globals dict; only its
+    # last update decides the values, so merge each distinct mapping once
+    last_index = {id(layer): i for i, layer in enumerate(layers)}
+    result: dict[str, object] = {}
+    for i, layer in enumerate(layers):
+        if last_index[id(layer)] == i:
+            result.update(layer)
     
     return result
 
 
+# Operation name reported when a union built with `|` is rejected in a REPL/exec context
+_UNION_OR_OPERATION = "create Rule union with '|' operator"
+
+
 class RuleUnion[*Ts]:
     """
     Represents a union of Rule classes (A | B | C).
@@ -187,9 +368,10 @@ class RuleUnion[*Ts]:
         alternatives: list[type['Rule']], 
         *, 
         _source_files: set[str] | None = None, 
-        _source_line: int | None = None
+        _source_line: int | None = None,
+        _operation: str = "create Rule union",
     ):
-        _check_not_in_repl("create Rule union")
+        _check_not_in_repl(_operation)
         self.alternatives = alternatives
         self._name: str | None = None
         self._grammar: GrammarRule | None = None
@@ -206,25 +388,30 @@ class RuleUnion[*Ts]:
         self.associativity: dict[type['Rule'], str] = {}
         self.longest_match: bool = False
         
-        # Track for auto-discovery
-        _all_rule_unions.append(self)
+        # (registry state, setup) from the last _registry_setup
+        self._cached_registry_setup: tuple[tuple[int, int], tuple] | None = None
+        # (fingerprint, rules) for the last DisambiguationRules built by _prepare_parse
+        self._cached_disambig: tuple[tuple, DisambiguationRules] | None = None
         
-        # Capture caller's locals so we can find the variable name later
-        _capture_caller_locals()
+        # Track for auto-discovery
+        global _rule_union_count
+        _rule_union_count += 1
+        self._union_serial = _rule_union_count
+        _unregistered_unions[self._union_serial] = self
         
-        # Capture source location if not provided - add caller's file to source_files
-        frame = inspect.currentframe()
+        # Find the defining frame once, for both the locals capture and the source location
+        caller = _find_caller_frame()
         try:
-            # Walk up to find the first frame outside this module
-            caller = frame.f_back
-            while caller and _is_turtles_core_internal_frame(caller.f_code.co_filename):
-                caller = caller.f_back
+            # Capture caller's locals so we can find the variable name later
+            _capture_caller_locals(caller)
+            
+            # Capture source location if not provided - add caller's file to source_files
             if caller:
                 self._source_files.add(caller.f_code.co_filename)
                 if self._source_line is None:
                     self._source_line = caller.f_lineno
         finally:
-            del frame
+            del caller
     
     @overload
     def __or__[U: Rule](self, other: type[U]) -> 'RuleUnion[*Ts, U]': ...
@@ -233,39 +420,37 @@ class RuleUnion[*Ts]:
     @overload
     def __or__(self, other: type[None]) -> 'RuleUnion[*Ts, None]': ...
     def __or__(self, other):
-        _check_not_in_repl("create Rule union with '|' operator")
         # Merge source files from both operands
         new_files = set(self._source_files)
         if isinstance(other, RuleUnion):
             new_files.update(other._source_files)
             return RuleUnion(self.alternatives + other.alternatives, 
-                           _source_files=new_files, _source_line=self._source_line)
+                           _source_files=new_files, _source_line=self._source_line, _operation=_UNION_OR_OPERATION)
         if other is type(None) or other is None:
             return RuleUnion(self.alternatives + [None],
-                           _source_files=new_files, _source_line=self._source_line)
+                           _source_files=new_files, _source_line=self._source_line, _operation=_UNION_OR_OPERATION)
         # Add source file from the other Rule if available
         if hasattr(other, '_grammar') and other._grammar is not None:
             new_files.add(other._grammar.source_file)
         return RuleUnion(self.alternatives + [other],
-                        _source_files=new_files, _source_line=self._source_line)
+                        _source_files=new_files, _source_line=self._source_line, _operation=_UNION_OR_OPERATION)
     
     @overload
     def __ror__[U: Rule](self, other: type[U]) -> 'RuleUnion[*Ts, U]': ...
     @overload
     def __ror__[U](self, other: 'RuleUnion[U]') -> 'RuleUnion[*Ts, U]': ...
     def __ror__(self, other):
-        _check_not_in_repl("create Rule union with '|' operator")
         # Merge source files from both operands
         new_files = set(self._source_files)
         if isinstance(other, RuleUnion):
             new_files.update(other._source_files)
             return RuleUnion(other.alternatives + self.alternatives,
-                           _source_files=new_files, _source_line=self._source_line)
+                           _source_files=new_files, _source_line=self._source_line, _operation=_UNION_OR_OPERATION)
         # Add source file from the other Rule if available
         if hasattr(other, '_grammar') and other._grammar is not None:
             new_files.add(other._grammar.source_file)
         return RuleUnion([other] + self.alternatives,
-                        _source_files=new_files, _source_line=self._source_line)
+                        _source_files=new_files, _source_line=self._source_line, _operation=_UNION_OR_OPERATION)
     
     def _register_with_name(self, name: str, source_file: str, source_line: int) -> None:
         """Internal registration with explicit source info."""
@@ -274,8 +459,15 @@ class RuleUnion[*Ts]:
         if self._grammar is not None:
             return  # Already registered
         
+        _unregistered_unions.pop(self._union_serial, None)
         self._name = name
         
+        # Alternative name -> (position in the union, class); the first of any repeated name wins
+        self._alt_by_name: dict[str, tuple[int, type['Rule']]] = {}
+        for i, alt in enumerate(self.alternatives):
+            if alt is not None:
+                self._alt_by_name.setdefault(alt.__name__, (i, alt))
+        
         # Build alternatives
         alt_elements = []
         for alt in self.alternatives:
@@ -295,15 +487,8 @@ class RuleUnion[*Ts]:
     
     def register(self, name: str) -> 'RuleUnion':
         """Explicitly register this union as a named rule."""
-        frame = inspect.currentframe()
-        try:
-            caller = frame.f_back
-            source_file = caller.f_code.co_filename
-            source_line = caller.f_lineno
-        finally:
-            del frame
-        
-        self._register_with_name(name, source_file, source_line)
+        caller = sys._getframe(1)
+        self._register_with_name(name, caller.f_code.co_filename, caller.f_lineno)
         return self
     
     def __str__(self) -> str:
@@ -319,11 +504,48 @@ class RuleUnion[*Ts]:
     
     def __call__(self, raw: str) -> Union[*Ts]:
         """Parse input string using this union as the start rule."""
-        from .gll import (
-            CompiledGrammar, GLLParser, DisambiguationRules, ParseError
-        )
+        return self._parse_prepared(raw, *self._prepare_parse())
+    
+    def parse_many(self, inputs: 'Iterable[str]') -> 'Iterator[Union[*Ts]]':
+        """
+        Parse each input string using this union as the start rule, yielding results lazily.
+        The grammar, disambiguation rules and parser are set up once and reused for every input.
+        """
+        setup = self._prepare_parse()
+        return (self._parse_prepared(raw, *setup) for raw in inputs)
+    
+    def _prepare_parse(self) -> tuple['CompiledGrammar', list['GrammarRule'], dict[str, type], 'GLLParser']:
+        """Register this union, compile the grammar and build a parser for it."""
+        from .gll import GLLParser
+        
+        grammar, rules, rule_classes = self._registry_setup()
+        
+        # Collect longest_match from ALL registered rules, not just the entry point. Rules and
+        # unions can have longest_match set at any time, so this is read on every parse
+        longest_match = _collect_longest_match(rule_classes)
+        
+        # Build disambiguation rules, reusing the previous ones while nothing they derive from changed
+        key = (tuple(self.precedence), tuple(self.associativity.items()), longest_match)
+        cached = self._cached_disambig
+        if cached is not None and cached[0] == key:
+            disambig = cached[1]
+        else:
+            disambig = _build_disambiguation(key[0], key[1], longest_match)
+            self._cached_disambig = (key, disambig)
+        
+        return grammar, rules, rule_classes, GLLParser(grammar, disambig)
+    
+    def _registry_setup(self) -> tuple['CompiledGrammar', list['GrammarRule'], dict[str, type]]:
+        """
+        Register this union and compile the grammar for its source files.
+        Returns (grammar, rules, rule classes map), reused until the registry changes.
+        """
         from .grammar import get_all_rules
         
+        cached = self._cached_registry_setup
+        if cached is not None and cached[0] == _registry_state():
+            return cached[1]
+        
         # Try to discover the variable name for this union before auto-generating
         # This allows unions defined in local scopes to get proper names
         if self._grammar is None:
@@ -352,30 +574,19 @@ class RuleUnion[*Ts]:
         # Get all registered rules from all source files in the union
         rules = get_all_rules(source_files=self._source_files)
         
-        # Build disambiguation rules
-        disambig = DisambiguationRules()
-        if self.precedence:
-            disambig.priority = [
-                r.__name__ if isinstance(r, type) else str(r)
-                for r in self.precedence
-            ]
-        if self.associativity:
-            disambig.associativity = {
-                (r.__name__ if isinstance(r, type) else str(r)): assoc
-                for r, assoc in self.associativity.items()
-            }
-        
-        # Collect longest_match from ALL registered rules, not just the entry point
+        # Map rule names to classes for hydration
         rule_classes = _build_rule_classes_map(source_files=self._source_files)
-        for rule_name, rule_cls in rule_classes.items():
-            if isinstance(rule_cls, type) and hasattr(rule_cls, 'longest_match') and rule_cls.longest_match:
-                disambig.longest_match.add(rule_name)
-            elif isinstance(rule_cls, RuleUnion) and hasattr(rule_cls, 'longest_match') and rule_cls.longest_match:
-                disambig.longest_match.add(rule_name)
         
-        # Compile and parse
-        grammar = CompiledGrammar.from_rules(rules)
-        parser = GLLParser(grammar, disambig)
+        # Compile (or reuse the compiled grammar)
+        grammar = _compile_grammar(rules)
+        setup = (grammar, rules, rule_classes)
+        # Registering unions above may have changed the registry, so record its state afterwards
+        self._cached_registry_setup = (_registry_state(), setup)
+        return setup
+    
+    def _parse_prepared(self, raw: str, grammar: 'CompiledGrammar', rules: list['GrammarRule'], rule_classes: dict[str, type], parser: 'GLLParser') -> Union[*Ts]:
+        """Parse and hydrate a single input with a parser from `_prepare_parse`."""
+        from .gll import ParseError
         
         result = parser.parse(self._name, raw)
         if result is None:
@@ -401,21 +612,19 @@ class RuleUnion[*Ts]:
         if matched_cls is None:
             matched_cls = self.alternatives[0]  # fallback
         
-        return _hydrate_tree(tree, raw, matched_cls, grammar, rules, source_files=self._source_files)
+        return _hydrate_tree(tree, raw, matched_cls, grammar, rules, rule_classes)
     
     def _find_matched_alternative(self, tree: 'ParseTree', input_str: str) -> type['Rule'] | None:
         """Determine which alternative in the union was matched."""
-        # Look at the tree label to determine which rule matched
-        for alt in self.alternatives:
-            if alt is None:
-                continue
-            if tree.label == alt.__name__:
-                return alt
-            # Check children
-            for child in tree.children:
-                if child.label == alt.__name__:
-                    return alt
-        return None
+        # Look at the tree label and its children's labels to determine which rule matched;
+        # when several alternatives appear, the one listed first in the union wins
+        alt_by_name = self._alt_by_name
+        best = alt_by_name.get(tree.label)
+        for child in tree.children:
+            entry = alt_by_name.get(child.label)
+            if entry is not None and (best is None or entry[0] < best[0]):
+                best = entry
+        return best[1] if best is not None else None
 
 
 def _auto_register_unions() -> None:
@@ -425,6 +634,9 @@ def _auto_register_unions() -> None:
     
     This allows rules defined inside functions to be discovered.
     """
+    if not _unregistered_unions:
+        return
+    
     # Collect all variables from captured locals and current call stack
     all_vars = _get_all_captured_vars()
     
@@ -443,7 +655,8 @@ def _auto_register_unions_for_file(source_file: str) -> None:
     This is needed when importing Rules from another file - we need to ensure
     all RuleUnions from that file are registered before parsing.
     """
-    import sys
+    if not _unregistered_unions:
+        return
     
     # Find the module for this source file
     source_module = None
@@ -456,7 +669,7 @@ def _auto_register_unions_for_file(source_file: str) -> None:
         return
     
     # Check all tracked unions from this file
-    for union in _all_rule_unions:
+    for union in list(_unregistered_unions.values()):
         if union._grammar is None and source_file in union._source_files:
             # Search the module's namespace for this union
             for name, value in vars(source_module).items():
@@ -465,6 +678,69 @@ def _auto_register_unions_for_file(source_file: str) -> None:
                     break
 
 
+# Compiled grammars keyed by the identity of the rules they were built from
+# Maps (id(rule), ...) to (rules, compiled grammar); keeping the rules alive keeps the ids valid
+_compiled_grammar_cache: dict[tuple[int, ...], tuple[tuple['GrammarRule', ...], 'CompiledGrammar']] = {}
+_COMPILED_GRAMMAR_CACHE_SIZE = 128
+
+
+def _compile_grammar(rules: list['GrammarRule']) -> 'CompiledGrammar':
+    """
+    Compile a set of registered rules, reusing the previous compilation of the same rules.
+    Redefining a rule registers a new GrammarRule object, so a changed grammar is a cache miss.
+    """
+    from .gll import CompiledGrammar
+    
+    key = tuple(map(id, rules))
+    cached = _compiled_grammar_cache.get(key)
+    if cached is not None:
+        return cached[1]
+    
+    grammar = CompiledGrammar.from_rules(rules)
+    if len(_compiled_grammar_cache) >= _COMPILED_GRAMMAR_CACHE_SIZE:
+        # Evict the oldest entry
+        del _compiled_grammar_cache[next(iter(_compiled_grammar_cache))]
+    _compiled_grammar_cache[key] = (tuple(rules), grammar)
+    return grammar
+
+
+def _registry_state() -> tuple[int, int]:
+    """
+    Snapshot of everything a cached parse setup depends on: the rule registry and the
+    set of RuleUnion objects (unions are registered lazily, so a new one may still need a name).
+    """
+    return registry_version(), _rule_union_count
+
+
+def _build_disambiguation(
+    precedence: tuple,
+    associativity: tuple[tuple[object, str], ...],
+    longest_match: frozenset[str],
+) -> 'DisambiguationRules':
+    """Build DisambiguationRules, converting class references to rule names."""
+    from .gll import DisambiguationRules
+    
+    return DisambiguationRules(
+        priority=[r.__name__ if isinstance(r, type) else str(r) for r in precedence],
+        associativity={
+            (r.__name__ if isinstance(r, type) else str(r)): assoc
+            for r, assoc in associativity
+        },
+        longest_match=set(longest_match),
+    )
+
+
+def _collect_longest_match(rule_classes: dict[str, type]) -> frozenset[str]:
+    """Names of all rules and unions in a rule classes map that currently prefer longest matches."""
+    longest_match: set[str] = set()
+    for rule_name, rule_cls in rule_classes.items():
+        if isinstance(rule_cls, type) and hasattr(rule_cls, 'longest_match') and rule_cls.longest_match:
+            longest_match.add(rule_name)
+        elif isinstance(rule_cls, RuleUnion) and hasattr(rule_cls, 'longest_match') and rule_cls.longest_match:
+            longest_match.add(rule_name)
+    return frozenset(longest_match)
+
+
 class RuleMeta(ABCMeta):
     @overload
     def __or__[T: Rule](cls: type[T], other: type[None]) -> RuleUnion[T | None]: ...
@@ -473,22 +749,20 @@ class RuleMeta(ABCMeta):
     @overload
     def __or__[T: Rule, U](cls: type[T], other: RuleUnion[U]) -> RuleUnion[T | U]: ...
     def __or__(cls, other):
-        _check_not_in_repl("create Rule union with '|' operator")
         if isinstance(other, RuleUnion):
-            return RuleUnion([cls] + other.alternatives)
+            return RuleUnion([cls] + other.alternatives, _operation=_UNION_OR_OPERATION)
         if other is type(None) or other is None:
-            return RuleUnion([cls, None])
-        return RuleUnion([cls, other])
+            return RuleUnion([cls, None], _operation=_UNION_OR_OPERATION)
+        return RuleUnion([cls, other], _operation=_UNION_OR_OPERATION)
 
     @overload
     def __ror__[T: Rule, U: Rule](cls: type[T], other: type[U]) -> RuleUnion[U | T]: ...
     @overload
     def __ror__[T: Rule, U](cls: type[T], other: RuleUnion[U]) -> RuleUnion[U | T]: ...
     def __ror__(cls, other):
-        _check_not_in_repl("create Rule union with '|' operator")
         if isinstance(other, RuleUnion):
-            return RuleUnion(other.alternatives + [cls])
-        return RuleUnion([other, cls])
+            return RuleUnion(other.alternatives + [cls], _operation=_UNION_OR_OPERATION)
+        return RuleUnion([other, cls], _operation=_UNION_OR_OPERATION)
     
     def __str__(cls) -> str:
         """Return the grammar rule string representation."""
@@ -505,9 +779,54 @@ class RuleMeta(ABCMeta):
 
     def __call__[T:Rule](cls: type[T], raw: str, /) -> T:
         """Parse input string and return a hydrated Rule instance."""
-        from .gll import CompiledGrammar, GLLParser, DisambiguationRules, ParseError
+        return cls._parse_prepared(raw, *cls._prepare_parse())
+    
+    def parse_many[T:Rule](cls: type[T], inputs: 'Iterable[str]', /) -> 'Iterator[T]':
+        """
+        Parse each input string and yield hydrated Rule instances lazily.
+        The grammar, disambiguation rules and parser are set up once and reused for every input.
+        """
+        setup = cls._prepare_parse()
+        return (cls._parse_prepared(raw, *setup) for raw in inputs)
+    
+    def _prepare_parse(cls) -> tuple[set[str], 'CompiledGrammar', list['GrammarRule'], dict[str, type], 'GLLParser']:
+        """Collect the rules this Rule depends on, compile the grammar and build a parser for it."""
+        from .gll import GLLParser
+        
+        source_files, grammar, rules, rule_classes = cls._registry_setup()
+        
+        # Collect longest_match from ALL registered rules, not just the entry point. Rules and
+        # unions can have longest_match set at any time, so this is read on every parse
+        longest_match = _collect_longest_match(rule_classes)
+        
+        # Build disambiguation rules from class attributes if present,
+        # reusing the previous ones while nothing they derive from changed
+        key = (
+            tuple(getattr(cls, 'precedence', ())),
+            tuple(getattr(cls, 'associativity', {}).items()),
+            longest_match,
+        )
+        cached = cls.__dict__.get('_cached_disambig')
+        if cached is not None and cached[0] == key:
+            disambig = cached[1]
+        else:
+            disambig = _build_disambiguation(key[0], key[1], longest_match)
+            cls._cached_disambig = (key, disambig)
+        
+        return source_files, grammar, rules, rule_classes, GLLParser(grammar, disambig)
+    
+    def _registry_setup(cls) -> tuple[set[str], 'CompiledGrammar', list['GrammarRule'], dict[str, type]]:
+        """
+        Collect the rules this Rule depends on and compile them.
+        Returns (source files, grammar, rules, rule classes map),
+        cached on the class until the registry changes.
+        """
         from .grammar import get_all_rules
         
+        cached = cls.__dict__.get('_cached_registry_setup')
+        if cached is not None and cached[0] == _registry_state():
+            return cached[1]
+        
         # Collect source files from the Rule and any rules it references
         source_files: set[str] = set()
         if hasattr(cls, '_grammar') and cls._grammar is not None:
@@ -516,7 +835,8 @@ class RuleMeta(ABCMeta):
         # Also collect source files from any rules referenced in class annotations
         # This enables cross-file composition when rules from other files are used
         sequence = getattr(cls, '_sequence', None)
-        if isinstance(sequence, list):
+        captured_vars: dict[str, object] | None = None
+        if isinstance(sequence, tuple):
             for item in sequence:
                 if isinstance(item, tuple) and len(item) == 3 and item[0] == 'decl':
                     # item is ("decl", field_name, annotation_text)
@@ -524,7 +844,9 @@ class RuleMeta(ABCMeta):
                     ann_text = item[2]
                     if ann_text:
                         # Try to find referenced rules in captured locals and modules
-                        for name, value in _get_all_captured_vars().items():
+                        if captured_vars is None:
+                            captured_vars = _get_all_captured_vars()
+                        for name, value in captured_vars.items():
                             if isinstance(value, type) and issubclass(value, Rule) and value is not Rule:
                                 if hasattr(value, '_grammar') and value._grammar is not None:
                                     if name in ann_text:
@@ -540,31 +862,21 @@ class RuleMeta(ABCMeta):
         # Get all registered rules from all collected source files
         rules = get_all_rules(source_files=source_files) if source_files else get_all_rules()
         
-        # Build disambiguation rules from class attributes if present
-        disambig = DisambiguationRules()
-        if hasattr(cls, 'precedence'):
-            # Convert class references to names
-            disambig.priority = [
-                r.__name__ if isinstance(r, type) else str(r) 
-                for r in cls.precedence
-            ]
-        if hasattr(cls, 'associativity'):
-            disambig.associativity = {
-                (r.__name__ if isinstance(r, type) else str(r)): assoc
-                for r, assoc in cls.associativity.items()
-            }
-        
-        # Collect longest_match from ALL registered rules, not just the entry point
+        # Map rule names to classes for hydration
         rule_classes = _build_rule_classes_map(source_files=source_files)
-        for rule_name, rule_cls in rule_classes.items():
-            if isinstance(rule_cls, type) and hasattr(rule_cls, 'longest_match') and rule_cls.longest_match:
-                disambig.longest_match.add(rule_name)
-            elif isinstance(rule_cls, RuleUnion) and hasattr(rule_cls, 'longest_match') and rule_cls.longest_match:
-                disambig.longest_match.add(rule_name)
         
-        # Compile grammar and parse
-        grammar = CompiledGrammar.from_rules(rules)
-        parser = GLLParser(grammar, disambig)
+        # Compile grammar (or reuse the compiled grammar)
+        grammar = _compile_grammar(rules)
+        setup = (source_files, grammar, rules, rule_classes)
+        # Without source files the rules come from the caller's file, so only cache when there are some.
+        # Registering unions above may have changed the registry, so record its state afterwards
+        if source_files:
+            cls._cached_registry_setup = (_registry_state(), setup)
+        return setup
+    
+    def _parse_prepared[T:Rule](cls: type[T], raw: str, source_files: set[str], grammar: 'CompiledGrammar', rules: list['GrammarRule'], rule_classes: dict[str, type], parser: 'GLLParser') -> T:
+        """Parse and hydrate a single input with a parser from `_prepare_parse`."""
+        from .gll import ParseError
         
         result = parser.parse(cls.__name__, raw)
         if result is None:
@@ -585,7 +897,7 @@ class RuleMeta(ABCMeta):
         tree = parser.extract_tree(result)
         
         # Hydrate into Rule instance
-        return _hydrate_tree(tree, raw, cls, grammar, rules, source_files=source_files)
+        return _hydrate_tree(tree, raw, cls, grammar, rules, rule_classes)
 
 
 def _build_rule_classes_map(
@@ -651,11 +963,7 @@ def _hydrate_tree(
     
     # Create instance without calling __init__
     # For mixin types (Rule, int), (Rule, str), etc., we need to use their __new__
-    mixin_base = None
-    for base in target_cls.__mro__:
-        if base in (int, float, str, bool) and base is not object:
-            mixin_base = base
-            break
+    mixin_base = target_cls._mixin_base
     
     if mixin_base:
         # Need to use mixin type's __new__ with the text value
@@ -666,8 +974,9 @@ def _hydrate_tree(
     else:
         instance = object.__new__(target_cls)
     
+    # Instance attributes are collected here and stored in one __dict__ update
     # Store the actual class for __class__ property
-    object.__setattr__(instance, '_actual_class', target_cls)
+    attrs: dict[str, object] = {'_actual_class': target_cls}
     
     # If the tree label doesn't match target_cls, find the matching subtree
     target_tree = tree
@@ -681,50 +990,37 @@ def _hydrate_tree(
         target_tree, input_str, target_cls, rules, rule_classes
     )
     
-    # Identify optional fields (those typed as optional[X] or X|None)
-    optional_fields: set[str] = set()
-    sequence = getattr(target_cls, "_sequence", None)
-    if isinstance(sequence, list):
-        for item in sequence:
-            if not isinstance(item, tuple) or len(item) != 3:
-                continue
-            kind, var_name, annotation_text = item
-            if kind != "decl" or not isinstance(var_name, str) or not annotation_text:
-                continue
-            normalized = annotation_text.replace(" ", "")
-            if normalized.startswith("optional[") or "|None" in normalized or "None|" in normalized:
-                optional_fields.add(var_name)
+    # Optional fields (those typed as optional[X] or X|None) are precomputed per class
+    optional_fields = target_cls._optional_fields
     
     # Populate captured fields
     for name, capture_values in captures.items():
         if name in string_captures:
             # Repeat of simple types (char class, literal) - join into string
-            setattr(instance, name, ''.join(str(v) for v in capture_values))
+            attrs[name] = ''.join(str(v) for v in capture_values)
         elif name in list_captures:
             # Repeat of complex types - keep as list
-            setattr(instance, name, capture_values)
+            attrs[name] = capture_values
         elif len(capture_values) == 1:
-            setattr(instance, name, capture_values[0])
+            attrs[name] = capture_values[0]
         elif len(capture_values) == 0 and name in optional_fields:
             # Empty optional field - use None instead of empty list
-            setattr(instance, name, None)
+            attrs[name] = None
         else:
-            setattr(instance, name, capture_values)
+            attrs[name] = capture_values
     
     # Handle mixin types (Rule, int), (Rule, str), etc.
-    for base in target_cls.__mro__:
-        if base in (int, float, str, bool) and base is not object:
-            try:
-                converted = base(text)
-                object.__setattr__(instance, '_mixin_value', converted)
-            except (ValueError, TypeError):
-                pass
-            break
+    if mixin_base:
+        try:
+            attrs['_mixin_value'] = mixin_base(text)
+        except (ValueError, TypeError):
+            pass
     
     # Store the matched text and original input
-    object.__setattr__(instance, '_text', text)
-    object.__setattr__(instance, '_tree', tree)
-    object.__setattr__(instance, '_input_str', input_str)
+    attrs['_text'] = text
+    attrs['_tree'] = tree
+    attrs['_input_str'] = input_str
+    instance.__dict__.update(attrs)
     
     # Handle custom converter (__convert__ method)
     if hasattr(target_cls, '__convert__'):
@@ -821,33 +1117,33 @@ def _grammar_guided_extract(
                         names.add(alt.__name__)
         return names
     
-    def find_all_rule_nodes(node: ParseTree, rule_name: str, results: list = None, depth: int = 0, skip_root: bool = True) -> list[ParseTree]:
+    def find_all_rule_nodes(node: ParseTree, rule_name: str, skip_root: bool = True) -> list[ParseTree]:
         """Find all Rule nodes by name (for repeats)."""
-        if results is None:
-            results = []
-        
-        # Expand rule name to include RuleUnion alternatives
+        results: list[ParseTree] = []
+        # Expand rule name to include RuleUnion alternatives (once per search, not per visited node)
         target_names = expand_rule_names(rule_name)
         
-        # Found exact match (but skip root to avoid returning the tree itself)
-        if node.label in target_names:
-            if depth == 0 and skip_root:
-                pass  # Skip root node, search children instead
-            else:
-                results.append(node)
-                return results  # Don't descend into the matched rule
-        
-        # Check compound labels
-        has_rule_in_label = '+' in node.label and any(n in node.label.split('+') for n in target_names)
-        
-        # Don't descend into other Rules (except root and compound labels)
-        if node.label in rule_classes and node.label != target_cls.__name__ and not has_rule_in_label:
-            return results
-        
-        # Search children
-        for child in node.children:
-            find_all_rule_nodes(child, rule_name, results, depth + 1, skip_root=False)
+        def _collect(n: ParseTree, is_root: bool) -> None:
+            # Found exact match (but skip root to avoid returning the tree itself)
+            if n.label in target_names:
+                if is_root and skip_root:
+                    pass  # Skip root node, search children instead
+                else:
+                    results.append(n)
+                    return  # Don't descend into the matched rule
+            
+            # Check compound labels
+            has_rule_in_label = '+' in n.label and not target_names.isdisjoint(n.label.split('+'))
+            
+            # Don't descend into other Rules (except root and compound labels)
+            if n.label in rule_classes and n.label != target_cls.__name__ and not has_rule_in_label:
+                return
+            
+            # Search children
+            for child in n.children:
+                _collect(child, False)
         
+        _collect(node, True)
         return results
     
     def find_capture_node(node: ParseTree, capture_name: str) -> tuple[ParseTree | None, int, int]:
@@ -952,7 +1248,7 @@ def _grammar_guided_extract(
                     return n
             
             # Check compound labels (e.g., "Key+WS+Val")
-            if '+' in n.label and any(name in n.label.split('+') for name in target_names):
+            if '+' in n.label and not target_names.isdisjoint(n.label.split('+')):
                 for child in n.children:
                     result = _search(child, False)
                     if result:
@@ -1130,35 +1426,58 @@ def _grammar_guided_extract(
 
 
 def _find_subtree_for_class(tree: 'ParseTree', class_name: str) -> 'ParseTree | None':
-    """Find the subtree whose label matches the given class name."""
-    if tree.label == class_name:
-        return tree
-    for child in tree.children:
-        result = _find_subtree_for_class(child, class_name)
-        if result:
-            return result
+    """Find the first subtree (in pre-order) whose label matches the given class name."""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.label == class_name:
+            return node
+        stack.extend(reversed(node.children))
     return None
 
 
 def _find_rule_in_tree(tree: 'ParseTree', rule_classes: dict[str, type]) -> type | None:
-    """Find the first Rule class in a tree's children (not the tree node itself)."""
-    for child in tree.children:
-        if child.label in rule_classes:
-            cls = rule_classes[child.label]
-            if isinstance(cls, type) and issubclass(cls, Rule):
-                return cls
-        result = _find_rule_in_tree(child, rule_classes)
-        if result:
-            return result
+    """Find the first Rule class (in pre-order) among a tree's descendants (not the tree node itself)."""
+    stack = list(reversed(tree.children))
+    while stack:
+        node = stack.pop()
+        cls = rule_classes.get(node.label)
+        if isinstance(cls, type) and issubclass(cls, Rule):
+            return cls
+        stack.extend(reversed(node.children))
     return None
 
 
+# Builtin types a Rule can mix in, e.g. class Int(Rule, int)
+_MIXIN_BASES = (int, float, str, bool)
+
+
+def _optional_field_names(sequence: tuple) -> frozenset[str]:
+    """Names of the fields in a class-body sequence typed as optional[X] or X|None."""
+    optional_fields: set[str] = set()
+    for item in sequence:
+        if not isinstance(item, tuple) or len(item) != 3:
+            continue
+        kind, var_name, annotation_text = item
+        if kind != "decl" or not isinstance(var_name, str) or not annotation_text:
+            continue
+        normalized = annotation_text.replace(" ", "")
+        if normalized.startswith("optional[") or "|None" in normalized or "None|" in normalized:
+            optional_fields.add(var_name)
+    return frozenset(optional_fields)
+
+
 type AsDictResult = str | int | float | bool | dict[str, AsDictResult] | list[AsDictResult]
 
 
 # @dataclass_transform()
 class Rule(ABC, metaclass=RuleMeta):
     """initialize a token subclass as a dataclass"""
+    # Names of fields typed as optional[X] or X|None (set per subclass in __init_subclass__)
+    _optional_fields: frozenset[str] = frozenset()
+    # First of int, float, str, bool in the MRO for mixin rules like (Rule, int) (set per subclass)
+    _mixin_base: type | None = None
+    
     # this is just a placeholder for type-checking. The actual implementation is in the __call__ method.
     @final
     def __init__(self, raw:str, /):
@@ -1177,9 +1496,9 @@ class Rule(ABC, metaclass=RuleMeta):
         actual_class = self._get_actual_class()
         
         # Check for mixin base (int, float, str, bool)
-        for base in actual_class.__mro__:
-            if base in (int, float, str, bool):
-                return base
+        mixin_base = actual_class._mixin_base
+        if mixin_base is not None:
+            return mixin_base
         
         # Check for converter result type
         try:
@@ -1294,18 +1613,7 @@ class Rule(ABC, metaclass=RuleMeta):
         
         # Use actual class, not mixin base
         cls = self._get_actual_class()
-        optional_fields: set[str] = set()
-        sequence = getattr(cls, "_sequence", None)
-        if isinstance(sequence, list):
-            for item in sequence:
-                if not isinstance(item, tuple) or len(item) != 3:
-                    continue
-                kind, var_name, annotation_text = item
-                if kind != "decl" or not isinstance(var_name, str) or not annotation_text:
-                    continue
-                normalized = annotation_text.replace(" ", "")
-                if normalized.startswith("optional[") or "|None" in normalized or "None|" in normalized:
-                    optional_fields.add(var_name)
+        optional_fields = cls._optional_fields
 
         def convert(value: str | int | float | bool | Rule | list | tuple) -> AsDictResult:
             if isinstance(value, Rule):
@@ -1346,10 +1654,10 @@ class Rule(ABC, metaclass=RuleMeta):
         raise TypeError(f"cannot convert {self.__class__.__name__} to float")
 
     @staticmethod
-    def _collect_sequence_for_class(target_cls: type) -> list:
-        """Return ordered (expr/decl) tuples found in the class body of target_cls."""
+    def _collect_sequence_for_class(target_cls: type) -> tuple:
+        """Return the ordered (expr/decl) tuples found in the class body of target_cls, frozen as a tuple."""
         try:
-            source_file = inspect.getsourcefile(target_cls) or inspect.getfile(target_cls)
+            source_file = _get_source_file(target_cls) or inspect.getfile(target_cls)
         except OSError as e:
             if str(e) == 'source code not available':
                 # TODO: have a fallback that makes use of metaclass capturing named expressions in the class body
@@ -1359,62 +1667,31 @@ class Rule(ABC, metaclass=RuleMeta):
 
         if not source_file:
             raise ValueError(f'Rule subclass `{target_cls.__name__}` must be defined in a file (e.g. cannot create a grammar rule in the REPL). Source code inspection failed.')
-        with open(source_file, "r") as fh:
-            file_source = fh.read()
-
-        module_ast = ast.parse(file_source)
-        _, class_start_lineno = inspect.getsourcelines(target_cls)
-
-        target_class_node = None
-        for node in ast.walk(module_ast):
-            if isinstance(node, ast.ClassDef) and node.name == target_cls.__name__ and node.lineno == class_start_lineno:
-                target_class_node = node
-                break
+        class_start_lineno = _class_first_lineno(target_cls)
 
-        if target_class_node is None:
-            # fallback: first class with matching name
-            for node in ast.walk(module_ast):
-                if isinstance(node, ast.ClassDef) and node.name == target_cls.__name__:
-                    target_class_node = node
-                    break
+        # Re-executing an unchanged class definition (module reload, re-import) reuses its sequence
+        mtime = os.stat(source_file).st_mtime_ns
+        cache_key = (source_file, target_cls.__qualname__, class_start_lineno, mtime)
+        cached = _sequence_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+        _, class_index = _get_module_ast(source_file, mtime)
+        target_class_node = _find_classdef(class_index, target_cls.__name__, class_start_lineno)
         if target_class_node is None:
-            return []
+            return ()
 
         sequence = []
         for stmt in target_class_node.body:
-            # capture bare string expressions (including the leading docstring if used that way)
-            if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str):
-                sequence.append(("expr", stmt.value.value))
-                continue
-
-            # capture variable annotations: a:int, b:str, etc.
-            if isinstance(stmt, ast.AnnAssign):
-                var_name = None
-                if isinstance(stmt.target, ast.Name):
-                    var_name = stmt.target.id
-                # best-effort to reconstruct the annotation text
-                annotation_text = ast.get_source_segment(file_source, stmt.annotation)
-                if annotation_text is None:
-                    try:
-                        annotation_text = ast.unparse(stmt.annotation)  # py>=3.9
-                    except Exception:
-                        annotation_text = None
-                sequence.append(("decl", var_name, annotation_text))
-                continue
-
-            # capture other bare expressions (e.g., char['+-'], sequence[...], etc.)
-            if isinstance(stmt, ast.Expr):
-                expr_text = ast.get_source_segment(file_source, stmt.value)
-                if expr_text is None:
-                    try:
-                        expr_text = ast.unparse(stmt.value)
-                    except Exception:
-                        continue
-                # Store as anonymous declaration (no name, just the expression)
-                sequence.append(("decl", None, expr_text))
+            handler = _SEQUENCE_STMT_HANDLERS.get(type(stmt))
+            if handler is None:
                 continue
+            item = handler(stmt)
+            if item is not None:
+                sequence.append(item)
 
+        sequence = tuple(sequence)
+        _sequence_cache[cache_key] = sequence
         return sequence
 
 
@@ -1425,14 +1702,14 @@ class Rule(ABC, metaclass=RuleMeta):
         # We check the class's source file, not the call stack, because the class
         # definition is what matters, not where the import started from
         try:
-            source_file = inspect.getsourcefile(cls)
+            source_file = _get_source_file(cls)
             if not source_file:
                 raise SourceNotAvailableError(
                     f"Cannot define Rule subclass '{cls.__name__}' in REPL/exec context. "
                     f"Grammar definitions must be in a .py file. "
                     f"You can import and use existing grammars from the REPL."
                 )
-            _, line_no = inspect.getsourcelines(cls)
+            line_no = _class_first_lineno(cls)
         except OSError as e:
             raise SourceNotAvailableError(
                 f"Cannot define Rule subclass '{cls.__name__}' in REPL/exec context. "
@@ -1449,8 +1726,16 @@ class Rule(ABC, metaclass=RuleMeta):
         _capture_caller_locals()
 
         # capture the ordered sequence of class-body expressions and declarations
-        sequence = Rule._collect_sequence_for_class(cls)
+        # (classes that supply their own _sequence skip source inspection entirely)
+        if '_sequence' in cls.__dict__:
+            sequence = tuple(cls.__dict__['_sequence'])
+        else:
+            sequence = Rule._collect_sequence_for_class(cls)
+        # structurally identical rule bodies share one sequence object
+        sequence = _interned_sequences.setdefault(sequence, sequence)
         setattr(cls, "_sequence", sequence)
+        setattr(cls, "_optional_fields", _optional_field_names(sequence))
+        setattr(cls, "_mixin_base", next((base for base in cls.__mro__ if base in _MIXIN_BASES), None))
 
         # build grammar and register
         grammar_rule = _build_grammar(cls.__name__, sequence, source_file, line_no)
@@ -1461,6 +1746,7 @@ class Rule(ABC, metaclass=RuleMeta):
 
 # TODO: consider instead making these just classes that we call with arguments, since they aren't rules (char needs special handling though...)
 class char(Rule):
+    _sequence = ()
     def __class_getitem__(self, item: str): ...
 class separator: 
     def __class_getitem__(self, item: Rule|RuleUnion|str): ...
@@ -1478,6 +1764,7 @@ class either[*Ts](Rule):
     Represents a choice between alternatives.
     Usage: either[A, B, C] or either[A | B | C]
     """
+    _sequence = ()
     
     def __class_getitem__(cls, items):
         # When either[A, B, C] is used, return a RuleUnion
@@ -1500,10 +1787,13 @@ class either[*Ts](Rule):
         return super().__class_getitem__(items)
 
 class repeat[T:Rule, *Rules](Rule):
+    _sequence = ()
     def __class_getitem__(self, item: Rule|RuleUnion|str): ...
 class optional[T:Rule](Rule):
+    _sequence = ()
     def __class_getitem__(self, item: Rule|RuleUnion|str): ...
 class sequence(Rule):
+    _sequence = ()
     def __class_getitem__(self, items): ...
 
 # # TBD how this will work
@@ -1511,6 +1801,49 @@ class sequence(Rule):
 #     alternatives: list[T]
 
 
+# Box-drawing pieces used by tree_string: the connector before an entry, and the
+# padding its children are indented by (continuing the vertical line unless it was last)
+_BRANCH_LAST = "└── "
+_BRANCH_MID = "├── "
+_PAD_LAST = "    "
+_PAD_MID = "│   "
+
+
+def _tree_fields(obj: Rule) -> list[tuple[str, object]]:
+    """Get field name/value pairs from a Rule instance, skipping empty optionals."""
+    fields = []
+    for key, value in obj.__dict__.items():
+        if not key.startswith('_'):  # Skip private attributes
+            # Skip None (empty optional fields) and empty lists (legacy)
+            if value is None or (isinstance(value, list) and len(value) == 0):
+                continue
+            fields.append((key, value))
+    return fields
+
+
+def _tree_class_name(rule: Rule) -> str:
+    """Get class name with mixin type annotation if present."""
+    actual_cls = rule._get_actual_class()
+    class_name = actual_cls.__name__
+    # Check for mixin base (int, float, str, bool)
+    mixin_base = actual_cls._mixin_base
+    if mixin_base is not None:
+        return f"{class_name}({mixin_base.__name__})"
+    return class_name
+
+
+def _push_tree_children(
+    stack: list[tuple[object, str, str, str]],
+    items: list[tuple[str, object]],
+    child_prefix: str,
+) -> None:
+    """Push labelled children onto tree_string's work stack, last child first."""
+    last = len(items) - 1
+    for i in range(last, -1, -1):
+        child_label, child_value = items[i]
+        stack.append((child_value, child_prefix, _BRANCH_LAST if i == last else _BRANCH_MID, child_label))
+
+
 def tree_string(node: Rule) -> str:
     """
     Generate a tree-formatted string representation of a parsed Rule.
@@ -1539,75 +1872,41 @@ def tree_string(node: Rule) -> str:
     """
     lines: list[str] = []
     
-    def get_fields(obj: Rule) -> list[tuple[str, object]]:
-        """Get field name/value pairs from a Rule instance, skipping empty optionals."""
-        fields = []
-        for key, value in obj.__dict__.items():
-            if not key.startswith('_'):  # Skip private attributes
-                # Skip None (empty optional fields) and empty lists (legacy)
-                if value is None or (isinstance(value, list) and len(value) == 0):
-                    continue
-                fields.append((key, value))
-        return fields
-    
-    def get_class_display_name(rule: Rule) -> str:
-        """Get class name with mixin type annotation if present."""
-        actual_cls = rule._get_actual_class()
-        class_name = actual_cls.__name__
-        # Check for mixin base (int, float, str, bool)
-        for base in actual_cls.__mro__:
-            if base in (int, float, str, bool):
-                return f"{class_name}({base.__name__})"
-        return class_name
+    # Start with the root node (use actual class name with mixin if present)
+    class_name = _tree_class_name(node)
+    lines.append(class_name)
+    
+    # Depth-first walk with an explicit stack of (value, prefix, connector, label) entries,
+    # so deeply nested results can't hit the recursion limit. Children are pushed in
+    # reverse so they pop (and print) in their original order. Every entry is labelled
+    # (a field name or list index), so each line is "<prefix><connector><label>: <text>".
+    stack: list[tuple[object, str, str, str]] = []
+    _push_tree_children(stack, _tree_fields(node), "")
     
-    def render_value(value: object, prefix: str, connector: str, label: str | None) -> None:
-        """Render a single value."""
+    while stack:
+        value, prefix, connector, label = stack.pop()
         if isinstance(value, Rule):
             # It's a Rule instance - show actual class name with mixin if present
-            class_name = get_class_display_name(value)
-            if label:
-                lines.append(f"{prefix}{connector}{label}: {class_name}")
-            else:
-                lines.append(f"{prefix}{connector}{class_name}")
+            lines.append(f"{prefix}{connector}{label}: {_tree_class_name(value)}")
             
             # Get fields for this Rule
-            fields = get_fields(value)
-            child_prefix = prefix + ("    " if connector == "└── " else "│   ")
+            fields = _tree_fields(value)
+            child_prefix = prefix + (_PAD_LAST if connector is _BRANCH_LAST else _PAD_MID)
             
             if fields:
-                for i, (field_name, field_value) in enumerate(fields):
-                    is_last = (i == len(fields) - 1)
-                    next_connector = "└── " if is_last else "├── "
-                    render_value(field_value, child_prefix, next_connector, field_name)
+                _push_tree_children(stack, fields, child_prefix)
             else:
                 # No fields - show the text value
                 if hasattr(value, '_text'):
-                    lines.append(f"{child_prefix}└── {value._text}")
+                    lines.append(f"{child_prefix}{_BRANCH_LAST}{value._text}")
         elif isinstance(value, list):
             # It's a list - render each item
-            if label:
-                lines.append(f"{prefix}{connector}{label}: [{len(value)} items]")
-            child_prefix = prefix + ("    " if connector == "└── " else "│   ")
-            for i, item in enumerate(value):
-                is_last = (i == len(value) - 1)
-                next_connector = "└── " if is_last else "├── "
-                render_value(item, child_prefix, next_connector, f"[{i}]")
+            lines.append(f"{prefix}{connector}{label}: [{len(value)} items]")
+            child_prefix = prefix + (_PAD_LAST if connector is _BRANCH_LAST else _PAD_MID)
+            _push_tree_children(stack, [(f"[{i}]", item) for i, item in enumerate(value)], child_prefix)
         else:
             # It's a simple value (string, int, etc.)
-            if label:
-                lines.append(f"{prefix}{connector}{label}: {value}")
-            else:
-                lines.append(f"{prefix}{connector}{value}")
-    
-    # Start with the root node (use actual class name with mixin if present)
-    class_name = get_class_display_name(node)
-    lines.append(class_name)
-    
-    fields = get_fields(node)
-    for i, (field_name, field_value) in enumerate(fields):
-        is_last = (i == len(fields) - 1)
-        connector = "└── " if is_last else "├── "
-        render_value(field_value, "", connector, field_name)
+            lines.append(f"{prefix}{connector}{label}: {value}")
     
     return "\n".join(lines)
 
@@ -16,7 +16,7 @@ everything else should just match the original implementation
 from __future__ import annotations
 
 from abc import ABC, ABCMeta
-from typing import Any, ClassVar, Union, TypeVar
+from typing import Any, ClassVar, Iterable, Iterator, Union, TypeVar
 
 # Re-export the grammar types
 from .grammar import GrammarRule
@@ -56,6 +56,7 @@ class RuleMeta(ABCMeta):
     # but for type checking we want Python's default behavior where
     # Float | Int creates a proper union type usable in annotations.
     def __call__(cls: type[_R], raw: str, /) -> _R: ...
+    def parse_many(cls: type[_R], inputs: Iterable[str], /) -> Iterator[_R]: ...
 
 class Rule(ABC, metaclass=RuleMeta):
     _text: str
@@ -10,7 +10,7 @@ Supports disambiguation via priority and associativity rules.
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Callable, Literal
+from typing import Callable, Literal, NamedTuple
 
 from .grammar import (
     GrammarElement,
@@ -318,6 +318,10 @@ def _parse_escape_sequence(pattern: str, i: int) -> tuple[str, int]:
     return ch, i + 1
 
 
+# Compiled char class matchers by pattern, shared by every CompiledGrammar in the process
+_char_matcher_cache: dict[str, Callable[[str], bool]] = {}
+
+
 def compile_char_class(pattern: str) -> Callable[[str], bool]:
     r"""
     Compile a character class pattern like 'a-zA-Z0-9_' into a matcher function.
@@ -328,8 +332,9 @@ def compile_char_class(pattern: str) -> Callable[[str], bool]:
     - Escape sequences: \\, \-, \n, \r, \t, \xHH, \uHHHH, \UHHHHHHHH
     - Literal dash at start/end: -a-z or a-z-
     
-    Uses range-based matching (not character enumeration) for efficiency with
-    large Unicode ranges.
+    ASCII characters are answered from a precomputed 128-entry table; other characters
+    use range-based matching (not character enumeration) for efficiency with large
+    Unicode ranges.
     """
     ranges: list[tuple[int, int]] = []  # (start_ord, end_ord) inclusive
     i = 0
@@ -380,12 +385,24 @@ def compile_char_class(pattern: str) -> Callable[[str], bool]:
                 merged.append((start, end))
         ranges = merged
     
+    # Precompute membership for the Latin-1 range as a lookup table (one index per character),
+    # which also covers specs like " -.\u00A0" whose only non-ASCII member is below 256
+    byte_table = bytearray(256)
+    for start, end in ranges:
+        for code in range(start, min(end, 255) + 1):
+            byte_table[code] = 1
+    byte_table = bytes(byte_table)
+    # Only ranges reaching past Latin-1 need to be scanned for other characters
+    wide_ranges = [(start, end) for start, end in ranges if end > 255]
+    
     # Create matcher function
     def matcher(c: str) -> bool:
         if not c:
             return False
         code = ord(c)
-        for start, end in ranges:
+        if code < 256:
+            return byte_table[code] == 1
+        for start, end in wide_ranges:
             if start <= code <= end:
                 return True
         return False
@@ -397,6 +414,23 @@ def compile_char_class(pattern: str) -> Callable[[str], bool]:
 # Grammar Compilation
 # =============================================================================
 
+class FirstSet(NamedTuple):
+    """The input characters an element can start with."""
+    chars: frozenset[str]  # ASCII characters that can begin a match
+    non_ascii: bool  # whether a non-ASCII character might begin a match
+    nullable: bool  # whether the element can match the empty string
+    
+    def admits(self, ch: str) -> bool:
+        """Check whether a match could begin with the given character."""
+        return ch in self.chars if ord(ch) < 128 else self.non_ascii
+
+
+_ASCII_CHARS = tuple(chr(code) for code in range(128))
+_EMPTY_FIRST = FirstSet(frozenset(), False, False)
+# Used for anything whose FIRST set is unknown: never rules out a match
+_ANY_FIRST = FirstSet(frozenset(_ASCII_CHARS), True, True)
+
+
 @dataclass
 class CompiledGrammar:
     """A grammar compiled for GLL parsing."""
@@ -404,6 +438,89 @@ class CompiledGrammar:
     slots: dict[str, list[GrammarSlot]]  # rule_name -> slots for that rule
     char_matchers: dict[str, Callable[[str], bool]]  # cached char class matchers
     body_to_rule: dict[str, str] = field(default_factory=dict)  # sequence description -> rule name
+    # id(choice) -> first character -> literal alternatives starting with it (None if not all-literal)
+    literal_choices: dict[int, dict[str, list[GrammarLiteral]] | None] = field(default_factory=dict)
+    # rule name -> FIRST set of the rule body (computed on first use)
+    first_sets: dict[str, FirstSet] | None = None
+    
+    def rule_first(self, name: str) -> FirstSet | None:
+        """Get the FIRST set of a rule, or None if the rule is unknown."""
+        if self.first_sets is None:
+            self.first_sets = self._compute_first_sets()
+        return self.first_sets.get(name)
+    
+    def _compute_first_sets(self) -> dict[str, FirstSet]:
+        """Compute FIRST sets for every rule by iterating to a fixed point (handles recursive rules)."""
+        first_sets = {name: _EMPTY_FIRST for name in self.rules}
+        changed = True
+        while changed:
+            changed = False
+            for name, rule in self.rules.items():
+                first = self._element_first(rule.body, first_sets)
+                if first != first_sets[name]:
+                    first_sets[name] = first
+                    changed = True
+        return first_sets
+    
+    def _element_first(self, elem: GrammarElement, first_sets: dict[str, FirstSet]) -> FirstSet:
+        """FIRST set of an element given the (possibly partial) FIRST sets of rules."""
+        if isinstance(elem, GrammarLiteral):
+            if not elem.value:
+                return FirstSet(frozenset(), False, True)
+            ch = elem.value[0]
+            if ord(ch) < 128:
+                return FirstSet(frozenset(ch), False, False)
+            return FirstSet(frozenset(), True, False)
+        elif isinstance(elem, GrammarCharClass):
+            matcher = self.char_matchers[elem.pattern]
+            chars = frozenset(ch for ch in _ASCII_CHARS if matcher(ch))
+            # Non-ASCII membership is not enumerated; assume the class may start with any of it
+            return FirstSet(chars, True, False)
+        elif isinstance(elem, GrammarRef):
+            return first_sets.get(elem.name, _ANY_FIRST)
+        elif isinstance(elem, GrammarCapture):
+            return self._element_first(elem.rule, first_sets)
+        elif isinstance(elem, GrammarRepeat):
+            inner = self._element_first(elem.element, first_sets)
+            return FirstSet(inner.chars, inner.non_ascii, inner.nullable or elem.at_least == 0)
+        elif isinstance(elem, GrammarChoice):
+            chars: frozenset[str] = frozenset()
+            non_ascii = nullable = False
+            for alt in elem.alternatives:
+                alt_first = self._element_first(alt, first_sets)
+                chars |= alt_first.chars
+                non_ascii = non_ascii or alt_first.non_ascii
+                nullable = nullable or alt_first.nullable
+            return FirstSet(chars, non_ascii, nullable)
+        elif isinstance(elem, GrammarSequence):
+            chars = frozenset()
+            non_ascii = False
+            for sub in elem.elements:
+                sub_first = self._element_first(sub, first_sets)
+                chars |= sub_first.chars
+                non_ascii = non_ascii or sub_first.non_ascii
+                if not sub_first.nullable:
+                    return FirstSet(chars, non_ascii, False)
+            return FirstSet(chars, non_ascii, True)
+        return _ANY_FIRST
+    
+    def literal_choice_index(self, choice: GrammarChoice) -> dict[str, list[GrammarLiteral]] | None:
+        """
+        Index an all-literal choice (e.g. either['x', 'ext', 'ext.', '#']) by first character,
+        so the parser only compares the alternatives that can start at the current input character.
+        Returns None for choices containing anything other than non-empty literals.
+        """
+        key = id(choice)
+        if key in self.literal_choices:
+            return self.literal_choices[key]
+        index: dict[str, list[GrammarLiteral]] | None = {}
+        for alt in choice.alternatives:
+            if not isinstance(alt, GrammarLiteral) or not alt.value:
+                index = None
+                break
+            index.setdefault(alt.value[0], []).append(alt)
+        self.literal_choices[key] = index
+        return index
     
     @classmethod
     def from_rules(cls, rules: list[GrammarRule]) -> CompiledGrammar:
@@ -426,9 +543,9 @@ class CompiledGrammar:
     def _element_description(cls, elem: GrammarElement) -> str:
         """Generate a description string matching SPPF node labels."""
         if isinstance(elem, GrammarLiteral):
-            return f'"{elem.value}"'
+            return elem.label
         elif isinstance(elem, GrammarCharClass):
-            return f"[{elem.pattern}]"
+            return elem.label
         elif isinstance(elem, GrammarRef):
             return elem.name
         elif isinstance(elem, GrammarSequence):
@@ -480,7 +597,11 @@ class CompiledGrammar:
         """Recursively compile character class matchers for an element."""
         if isinstance(elem, GrammarCharClass):
             if elem.pattern not in char_matchers:
-                char_matchers[elem.pattern] = compile_char_class(elem.pattern)
+                # Each pattern's spec is only parsed into a lookup table once per process
+                matcher = _char_matcher_cache.get(elem.pattern)
+                if matcher is None:
+                    matcher = _char_matcher_cache[elem.pattern] = compile_char_class(elem.pattern)
+                char_matchers[elem.pattern] = matcher
         elif isinstance(elem, GrammarCapture):
             cls._compile_char_matchers(elem.rule, char_matchers)
         elif isinstance(elem, GrammarRepeat):
@@ -497,6 +618,10 @@ class CompiledGrammar:
 # GLL Parser
 # =============================================================================
 
+# Char class patterns that are reported as "whitespace" once matched
+_WHITESPACE_PATTERNS = frozenset((' \t\n\r', '\x20\t\n\r', ' \t'))
+
+
 class GLLParser:
     """
     GLL Parser implementation.
@@ -508,6 +633,11 @@ class GLLParser:
     def __init__(self, grammar: CompiledGrammar, disambig: DisambiguationRules | None = None):
         self.grammar = grammar
         self.disambig = disambig or DisambiguationRules()
+        # Rule name -> priority score, resolved once per parser rather than per scored family
+        # (same scores as DisambiguationRules.get_priority: duplicates keep their first index)
+        self._priority_scores: dict[str, int] = {}
+        for idx, name in enumerate(self.disambig.priority):
+            self._priority_scores.setdefault(name, -idx)
         
         # Parser state (reset for each parse)
         self.input: str = ""
@@ -531,6 +661,8 @@ class GLLParser:
         self.furthest_pos: int = 0
         self.expected_at_furthest: set[ExpectedElement] = set()
         self.contexts_at_furthest: list[ParseContext] = []
+        # Dedup index over contexts_at_furthest, bucketed by (rule, field, position)
+        self._furthest_context_index: dict[tuple[str, str | None, int], list[ParseContext]] = {}
         self._current_contexts: list[ParseContext] = []  # Current parse context stack
     
     def _reset(self, input_str: str) -> None:
@@ -553,6 +685,7 @@ class GLLParser:
         self.furthest_pos = 0
         self.expected_at_furthest.clear()
         self.contexts_at_furthest.clear()
+        self._furthest_context_index.clear()
         self._current_contexts.clear()
         self._current_gss: GSSNode | None = None
         
@@ -560,7 +693,8 @@ class GLLParser:
         # Maps descriptor key -> ActiveContext for tracking in-progress rules
         self._active_contexts: dict[str, ActiveContext] = {}
         # Track which elements matched at each position (for filtering expected)
-        self._matched_at_pos: dict[int, set[str]] = {}
+        # Indexed directly by position; match ends never exceed input_len
+        self._matched_at_pos: list[set[str] | None] = [None] * (self.input_len + 1)
     
     def _slot_key(self, slot: GrammarSlot) -> str:
         """Create a hashable key for a slot."""
@@ -584,21 +718,21 @@ class GLLParser:
             self.furthest_pos = pos
             self.expected_at_furthest.clear()
             self.contexts_at_furthest.clear()
+            self._furthest_context_index.clear()
         
         if pos >= self.furthest_pos:
             # Check if this element was already matched just before this position
             # If so, don't list it as expected (e.g., don't say "expected whitespace"
             # if whitespace was just matched)
             should_add = True
-            for prev_pos in range(max(0, pos - 5), pos):
-                if prev_pos in self._matched_at_pos:
-                    if expected.description in self._matched_at_pos[prev_pos]:
-                        should_add = False
-                        break
+            for matched in self._matched_at_pos[max(0, pos - 5):pos]:
+                if matched is not None and expected.description in matched:
+                    should_add = False
+                    break
             
             if should_add:
                 self.expected_at_furthest.add(expected)
-            if context and context not in self.contexts_at_furthest:
+            if context and not self._has_furthest_context(context):
                 # Check if this context's rule completed before the error position
                 ctx_key = f"{context.rule_name}:{context.position}"
                 skip_context = False
@@ -607,7 +741,7 @@ class GLLParser:
                     if actx.is_complete and actx.end_pos is not None and actx.end_pos < pos:
                         skip_context = True
                 if not skip_context:
-                    self.contexts_at_furthest.append(context)
+                    self._add_furthest_context(context)
             
             # Walk up the GSS to capture parent contexts (where rules started)
             # Use provided gss or fall back to current_gss
@@ -615,6 +749,16 @@ class GLLParser:
             if gss_to_use:
                 self._capture_gss_contexts(gss_to_use)
     
+    def _has_furthest_context(self, ctx: ParseContext) -> bool:
+        """Check whether an equal context was already recorded at the furthest position."""
+        bucket = self._furthest_context_index.get((ctx.rule_name, ctx.field_name, ctx.position))
+        return bucket is not None and ctx in bucket
+    
+    def _add_furthest_context(self, ctx: ParseContext) -> None:
+        """Record a context at the furthest position (caller has checked it is new)."""
+        self.contexts_at_furthest.append(ctx)
+        self._furthest_context_index.setdefault((ctx.rule_name, ctx.field_name, ctx.position), []).append(ctx)
+    
     def _capture_gss_contexts(self, gss: 'GSSNode') -> None:
         """
         Capture context information for error reporting.
@@ -642,7 +786,16 @@ class GLLParser:
         active_ctxs.sort(key=lambda c: -c.start_pos)
         
         # Convert to ParseContext and add
+        index = self._furthest_context_index
         for active_ctx in active_ctxs:
+            # Most of these were already recorded by an earlier failure at the same position,
+            # so compare against the recorded contexts before building (and copying into) a new one
+            bucket = index.get((active_ctx.rule_name, active_ctx.field_name, active_ctx.start_pos))
+            if bucket is not None and any(
+                c.grammar_element is None and c.matched_elements == active_ctx.matched_elements
+                for c in bucket
+            ):
+                continue
             ctx = ParseContext(
                 rule_name=active_ctx.rule_name,
                 field_name=active_ctx.field_name,
@@ -650,8 +803,7 @@ class GLLParser:
                 grammar_element=None,
                 matched_elements=active_ctx.matched_elements.copy(),
             )
-            if ctx not in self.contexts_at_furthest:
-                self.contexts_at_furthest.append(ctx)
+            self._add_furthest_context(ctx)
         
         # Fall back to GSS-based tracking for any additional context
         # but only if we didn't find enough from active contexts
@@ -683,8 +835,8 @@ class GLLParser:
                             position=current.call_start,
                             grammar_element=current.slot.element if current.slot else None,
                         )
-                        if ctx not in self.contexts_at_furthest:
-                            self.contexts_at_furthest.append(ctx)
+                        if not self._has_furthest_context(ctx):
+                            self._add_furthest_context(ctx)
                 
                 edges = self.gss_edges.get(current, [])
                 if edges:
@@ -696,7 +848,7 @@ class GLLParser:
         """Get aggregated failure information."""
         return FailureInfo(
             position=self.furthest_pos,
-            expected=list(self.expected_at_furthest),
+            expected=sorted(self.expected_at_furthest, key=lambda e: (e.kind, e.description)),
             contexts=self.contexts_at_furthest.copy(),
             partial_match_end=self.furthest_pos,
         )
@@ -898,58 +1050,67 @@ class GLLParser:
                 # Empty/epsilon - always matches, consumes nothing
                 return (pos, self._get_or_create_sppf("ε", pos, pos))
             
-            end = pos + len(element.value)
-            if end <= self.input_len and self.input[pos:end] == element.value:
-                sppf = self._get_or_create_sppf(f'"{element.value}"', pos, end)
-                sppf.families = [PackedNode(f'"{element.value}"', pos, [])]
+            label = element.label
+            if self.input.startswith(element.value, pos):
+                end = pos + len(element.value)
+                sppf = self._get_or_create_sppf(label, pos, end)
+                sppf.families = [PackedNode(label, pos, [])]
                 # Track that this matched - at both start and end positions
                 # This helps filter expected elements when we fail after this match
-                if end not in self._matched_at_pos:
-                    self._matched_at_pos[end] = set()
-                self._matched_at_pos[end].add(f'"{element.value}"')
+                matched = self._matched_at_pos[end]
+                if matched is None:
+                    matched = self._matched_at_pos[end] = set()
+                matched.add(label)
                 return (end, sppf)
             # Record failure
             self._record_failure(
                 pos,
-                ExpectedElement('literal', f'"{element.value}"', element),
+                ExpectedElement('literal', label, element),
                 context,
             )
             return None
         
         elif isinstance(element, GrammarCharClass):
+            label = element.label
             if pos >= self.input_len:
                 # Record failure - expected char class at end of input
                 self._record_failure(
                     pos,
-                    ExpectedElement('char_class', f'[{element.pattern}]', element),
+                    ExpectedElement('char_class', label, element),
                     context,
                 )
                 return None
             char = self.input[pos]
             matcher = self.grammar.char_matchers.get(element.pattern)
             if matcher and matcher(char):
-                sppf = self._get_or_create_sppf(f"[{element.pattern}]", pos, pos + 1)
-                sppf.families = [PackedNode(char, pos, [])]
-                # Track that this matched at this position
-                # Used to filter expected elements if we later fail after this match
-                if pos not in self._matched_at_pos:
-                    self._matched_at_pos[pos] = set()
-                # Track both raw pattern and friendly name
-                self._matched_at_pos[pos].add(f"[{element.pattern}]")
-                # Also track friendly names for common patterns
-                if element.pattern in (' \t\n\r', '\x20\t\n\r', ' \t'):
-                    self._matched_at_pos[pos].add("whitespace")
-                return (pos + 1, sppf)
+                return (pos + 1, self._char_class_leaf(element, pos, char))
             # Record failure
             self._record_failure(
                 pos,
-                ExpectedElement('char_class', f'[{element.pattern}]', element),
+                ExpectedElement('char_class', label, element),
                 context,
             )
             return None
         
         return None
     
+    def _char_class_leaf(self, element: GrammarCharClass, pos: int, char: str) -> SPPFNode:
+        """Build the SPPF leaf for a char class that matched the character at pos."""
+        label = element.label
+        sppf = self._get_or_create_sppf(label, pos, pos + 1)
+        sppf.families = [PackedNode(char, pos, [])]
+        # Track that this matched at this position
+        # Used to filter expected elements if we later fail after this match
+        matched = self._matched_at_pos[pos]
+        if matched is None:
+            matched = self._matched_at_pos[pos] = set()
+        # Track both raw pattern and friendly name
+        matched.add(label)
+        # Also track friendly names for common patterns
+        if element.pattern in _WHITESPACE_PATTERNS:
+            matched.add("whitespace")
+        return sppf
+    
     def _process_slot(self, desc: Descriptor) -> None:
         """Process a single descriptor/slot."""
         slot = desc.slot
@@ -1233,21 +1394,20 @@ class GLLParser:
         """Process a choice element by trying all alternatives."""
         context = self._make_context(desc.slot, desc.pos, capture_name)
         
+        literal_index = self.grammar.literal_choice_index(choice)
+        if literal_index is not None:
+            self._process_literal_choice(choice, literal_index, desc, context, capture_name)
+            return
+        
         for i, alt in enumerate(choice.alternatives):
             # For each alternative, try to match it
             if isinstance(alt, (GrammarLiteral, GrammarCharClass)):
-                result = self._match_terminal(alt, desc.pos, context)
-                if result:
-                    new_pos, term_sppf = result
-                    if capture_name:
-                        capture_sppf = self._get_or_create_sppf(f":{capture_name}", term_sppf.start, term_sppf.end)
-                        capture_sppf.families = term_sppf.families[:]
-                        term_sppf = capture_sppf
-                    combined = self._combine_sppf(desc.sppf, term_sppf)
-                    next_slot = self._next_slot(desc.slot)
-                    if next_slot:
-                        self._add(Descriptor(next_slot, desc.gss, new_pos, combined))
+                self._process_terminal_alternative(alt, desc, context, capture_name)
             elif isinstance(alt, GrammarRef):
+                # Behind the furthest failure an alternative that can't start here would only
+                # fail silently, so skip calling it (failures at the frontier are still recorded)
+                if desc.pos < self.furthest_pos and not self._can_start(alt.name, desc.pos):
+                    continue
                 rule = self.grammar.rules.get(alt.name)
                 if rule:
                     called_slots = self.grammar.slots.get(alt.name, [])
@@ -1268,6 +1428,55 @@ class GLLParser:
         # when they don't match, so we don't need to record a combined description
         pass
     
+    def _process_terminal_alternative(
+        self,
+        alt: GrammarLiteral | GrammarCharClass,
+        desc: Descriptor,
+        context: ParseContext,
+        capture_name: str | None = None,
+    ) -> None:
+        """Match a terminal alternative of a choice and, if it matches, continue after the choice."""
+        result = self._match_terminal(alt, desc.pos, context)
+        if result:
+            new_pos, term_sppf = result
+            if capture_name:
+                capture_sppf = self._get_or_create_sppf(f":{capture_name}", term_sppf.start, term_sppf.end)
+                capture_sppf.families = term_sppf.families[:]
+                term_sppf = capture_sppf
+            combined = self._combine_sppf(desc.sppf, term_sppf)
+            next_slot = self._next_slot(desc.slot)
+            if next_slot:
+                self._add(Descriptor(next_slot, desc.gss, new_pos, combined))
+    
+    def _can_start(self, rule_name: str, pos: int) -> bool:
+        """Check (via its FIRST set) whether a rule could match at the given position."""
+        first = self.grammar.rule_first(rule_name)
+        if first is None or first.nullable:
+            return True
+        if pos >= self.input_len:
+            return False
+        return first.admits(self.input[pos])
+    
+    def _process_literal_choice(
+        self,
+        choice: GrammarChoice,
+        literal_index: dict[str, list[GrammarLiteral]],
+        desc: Descriptor,
+        context: ParseContext,
+        capture_name: str | None = None,
+    ) -> None:
+        """Process an all-literal choice, only trying alternatives that share the current input character."""
+        pos = desc.pos
+        candidates = literal_index.get(self.input[pos], ()) if pos < self.input_len else ()
+        for alt in candidates:
+            self._process_terminal_alternative(alt, desc, context, capture_name)
+        
+        # Alternatives that were skipped still count as expected for error reporting
+        if pos >= self.furthest_pos:
+            for alt in choice.alternatives:
+                if alt not in candidates:
+                    self._record_failure(pos, ExpectedElement('literal', alt.label, alt), context)
+    
     def _process_repeat(self, repeat: GrammarRepeat, desc: Descriptor, capture_name: str | None = None) -> None:
         """Process a repeat element."""
         # For repeat, we need to handle:
@@ -1295,9 +1504,8 @@ class GLLParser:
         For GrammarRef separators, returns None (requires async handling).
         """
         if isinstance(separator, GrammarLiteral):
-            sep_end = pos + len(separator.value)
-            if sep_end <= self.input_len and self.input[pos:sep_end] == separator.value:
-                return sep_end
+            if self.input.startswith(separator.value, pos):
+                return pos + len(separator.value)
             return None
         elif isinstance(separator, GrammarCharClass):
             if pos >= self.input_len:
@@ -1317,9 +1525,9 @@ class GLLParser:
     def _separator_description(self, separator: GrammarElement) -> str | None:
         """Get a human-readable description of a separator."""
         if isinstance(separator, GrammarLiteral):
-            return f'"{separator.value}"'
+            return separator.label
         elif isinstance(separator, GrammarCharClass):
-            return f'[{separator.pattern}]'
+            return separator.label
         elif isinstance(separator, GrammarRef):
             return separator.name
         return None
@@ -1335,15 +1543,44 @@ class GLLParser:
         accumulated_sppf: SPPFNode | None,
         capture_name: str | None,
     ) -> None:
-        """Parse repeated items."""
+        """
+        Parse repeated items.
+        
+        Terminal items (literals and char classes) are matched in a loop rather than one
+        recursive call per item, so long runs like repeat[char['0-9']] neither grow the
+        Python stack nor risk hitting the recursion limit.
+        """
         pos = desc.pos
+        # Char class items are tested inline against the input; only the character that
+        # ends the run goes through _match_terminal (with a context) to record the failure
+        matcher = None
+        if isinstance(element, GrammarCharClass):
+            matcher = self.grammar.char_matchers.get(element.pattern)
+        input_str = self.input
+        input_len = self.input_len
         
-        # Check if we've reached maximum
-        if at_most is not None and items_parsed >= at_most:
-            # Must stop here
+        while True:
+            # Check if we've reached maximum
+            if at_most is not None and items_parsed >= at_most:
+                # Must stop here
+                if items_parsed >= at_least:
+                    if capture_name:
+                        final_sppf = self._get_or_create_sppf(f":{capture_name}", 
+                            accumulated_sppf.start if accumulated_sppf else pos, pos)
+                        if accumulated_sppf:
+                            final_sppf.families = accumulated_sppf.families[:]
+                    else:
+                        final_sppf = accumulated_sppf
+                    combined = self._combine_sppf(desc.sppf, final_sppf)
+                    next_slot = self._next_slot(desc.slot)
+                    if next_slot:
+                        self._add(Descriptor(next_slot, desc.gss, pos, combined))
+                return
+            
+            # If we have enough items, we can stop here (but may also continue)
             if items_parsed >= at_least:
                 if capture_name:
-                    final_sppf = self._get_or_create_sppf(f":{capture_name}", 
+                    final_sppf = self._get_or_create_sppf(f":{capture_name}",
                         accumulated_sppf.start if accumulated_sppf else pos, pos)
                     if accumulated_sppf:
                         final_sppf.families = accumulated_sppf.families[:]
@@ -1353,103 +1590,97 @@ class GLLParser:
                 next_slot = self._next_slot(desc.slot)
                 if next_slot:
                     self._add(Descriptor(next_slot, desc.gss, pos, combined))
-            return
-        
-        # If we have enough items, we can stop here (but may also continue)
-        if items_parsed >= at_least:
-            if capture_name:
-                final_sppf = self._get_or_create_sppf(f":{capture_name}",
-                    accumulated_sppf.start if accumulated_sppf else pos, pos)
-                if accumulated_sppf:
-                    final_sppf.families = accumulated_sppf.families[:]
-            else:
-                final_sppf = accumulated_sppf
-            combined = self._combine_sppf(desc.sppf, final_sppf)
-            next_slot = self._next_slot(desc.slot)
-            if next_slot:
-                self._add(Descriptor(next_slot, desc.gss, pos, combined))
-        
-        # Try to parse one more item
-        # If not first item and separator exists, match separator first
-        if items_parsed > 0 and separator:
-            if self._is_simple_separator(separator):
-                sep_pos = self._match_separator(separator, pos)
-                if sep_pos is not None:
-                    pos = sep_pos
-                else:
-                    # Record that we expected the separator
-                    if items_parsed < at_least or at_most is None or items_parsed < at_most:
-                        sep_desc = self._separator_description(separator)
-                        if sep_desc:
-                            self._record_failure(
-                                pos,
-                                ExpectedElement('literal', sep_desc, separator),
-                                None,
+            
+            # Try to parse one more item
+            # If not first item and separator exists, match separator first
+            if items_parsed > 0 and separator:
+                if self._is_simple_separator(separator):
+                    sep_pos = self._match_separator(separator, pos)
+                    if sep_pos is not None:
+                        pos = sep_pos
+                    else:
+                        # Record that we expected the separator
+                        if items_parsed < at_least or at_most is None or items_parsed < at_most:
+                            sep_desc = self._separator_description(separator)
+                            if sep_desc:
+                                self._record_failure(
+                                    pos,
+                                    ExpectedElement('literal', sep_desc, separator),
+                                    None,
+                                )
+                        return  # Can't continue without separator
+                elif isinstance(separator, GrammarRef):
+                    # Complex separator - parse asynchronously
+                    sep_rule = self.grammar.rules.get(separator.name)
+                    if sep_rule:
+                        called_slots = self.grammar.slots.get(separator.name, [])
+                        if called_slots:
+                            first_slot = called_slots[0]
+                            self._repeat_counter += 1
+                            cont_name = f"_repeat_sep_{self._repeat_counter}"
+                            cont_slot = GrammarSlot(cont_name, separator, 0, 1)
+                            # Store state for after separator is parsed, including accumulated SPPF
+                            self._repeat_state[cont_name] = (
+                                element, separator, at_least, at_most,
+                                items_parsed, capture_name, desc, accumulated_sppf  # Include accumulated SPPF
                             )
-                    return  # Can't continue without separator
-            elif isinstance(separator, GrammarRef):
-                # Complex separator - parse asynchronously
-                sep_rule = self.grammar.rules.get(separator.name)
-                if sep_rule:
-                    called_slots = self.grammar.slots.get(separator.name, [])
+                            new_gss = self._create(cont_slot, desc.gss, pos, None)  # Don't pass SPPF through edge
+                            self._add(Descriptor(first_slot, new_gss, pos, None))
+                    return  # Separator parsing is async, we'll continue when it returns
+                else:
+                    return  # Unsupported separator type
+            
+            # Try to match the repeated element
+            if matcher is not None and pos < input_len and matcher(input_str[pos]):
+                item_sppf = self._char_class_leaf(element, pos, input_str[pos])
+                accumulated_sppf = self._combine_sppf(accumulated_sppf, item_sppf)
+                pos += 1
+                desc = Descriptor(desc.slot, desc.gss, pos, desc.sppf)
+                items_parsed += 1
+                continue
+            context = self._make_context(desc.slot, desc.pos, capture_name)
+            if isinstance(element, (GrammarLiteral, GrammarCharClass)):
+                result = self._match_terminal(element, pos, context)
+                if not result:
+                    return
+                # Continue parsing more items from after this one
+                new_pos, item_sppf = result
+                accumulated_sppf = self._combine_sppf(accumulated_sppf, item_sppf)
+                desc = Descriptor(desc.slot, desc.gss, new_pos, desc.sppf)
+                pos = new_pos
+                items_parsed += 1
+                continue
+            elif isinstance(element, GrammarRef):
+                # Need to call the referenced rule and continue from result
+                rule = self.grammar.rules.get(element.name)
+                if rule:
+                    called_slots = self.grammar.slots.get(element.name, [])
                     if called_slots:
                         first_slot = called_slots[0]
+                        # Create a repeat continuation slot
                         self._repeat_counter += 1
-                        cont_name = f"_repeat_sep_{self._repeat_counter}"
-                        cont_slot = GrammarSlot(cont_name, separator, 0, 1)
-                        # Store state for after separator is parsed, including accumulated SPPF
+                        cont_name = f"_repeat_{self._repeat_counter}"
+                        cont_slot = GrammarSlot(cont_name, element, 0, 1)
+                        # Store repeat state for when we return, including accumulated SPPF
                         self._repeat_state[cont_name] = (
                             element, separator, at_least, at_most,
-                            items_parsed, capture_name, desc, accumulated_sppf  # Include accumulated SPPF
+                            items_parsed, capture_name, desc, accumulated_sppf
+                        )
+                        # Create GSS edge to continue at repeat continuation
+                        new_gss = self._create(
+                            cont_slot, desc.gss, pos, desc.sppf,
+                            called_rule=element.name, call_start=pos
                         )
-                        new_gss = self._create(cont_slot, desc.gss, pos, None)  # Don't pass SPPF through edge
                         self._add(Descriptor(first_slot, new_gss, pos, None))
-                return  # Separator parsing is async, we'll continue when it returns
-            else:
-                return  # Unsupported separator type
-        
-        # Try to match the repeated element
-        context = self._make_context(desc.slot, desc.pos, capture_name)
-        if isinstance(element, (GrammarLiteral, GrammarCharClass)):
-            result = self._match_terminal(element, pos, context)
-            if result:
-                new_pos, item_sppf = result
-                new_acc = self._combine_sppf(accumulated_sppf, item_sppf)
-                # Continue parsing more items
-                new_desc = Descriptor(desc.slot, desc.gss, new_pos, desc.sppf)
-                self._parse_repeat_items(
-                    element, separator, at_least, at_most, new_desc,
-                    items_parsed + 1, new_acc, capture_name,
+            
+            elif isinstance(element, GrammarChoice):
+                # Handle choice within repeat - try each alternative
+                self._parse_repeat_choice(
+                    element, separator, at_least, at_most, desc,
+                    items_parsed, accumulated_sppf, capture_name, pos
                 )
-        elif isinstance(element, GrammarRef):
-            # Need to call the referenced rule and continue from result
-            rule = self.grammar.rules.get(element.name)
-            if rule:
-                called_slots = self.grammar.slots.get(element.name, [])
-                if called_slots:
-                    first_slot = called_slots[0]
-                    # Create a repeat continuation slot
-                    self._repeat_counter += 1
-                    cont_name = f"_repeat_{self._repeat_counter}"
-                    cont_slot = GrammarSlot(cont_name, element, 0, 1)
-                    # Store repeat state for when we return, including accumulated SPPF
-                    self._repeat_state[cont_name] = (
-                        element, separator, at_least, at_most,
-                        items_parsed, capture_name, desc, accumulated_sppf
-                    )
-                    # Create GSS edge to continue at repeat continuation
-                    new_gss = self._create(
-                        cont_slot, desc.gss, pos, desc.sppf,
-                        called_rule=element.name, call_start=pos
-                    )
-                    self._add(Descriptor(first_slot, new_gss, pos, None))
-        
-        elif isinstance(element, GrammarChoice):
-            # Handle choice within repeat - try each alternative
-            self._parse_repeat_choice(
-                element, separator, at_least, at_most, desc,
-                items_parsed, accumulated_sppf, capture_name, pos
-            )
+            return
+
     
     def _parse_repeat_element(
         self,
@@ -1789,9 +2020,8 @@ class GLLParser:
         
         # Try to parse one more item
         if items_parsed > 0 and separator:
-            sep_end = pos + len(separator)
-            if sep_end <= self.input_len and self.input[pos:sep_end] == separator:
-                pos = sep_end
+            if self.input.startswith(separator, pos):
+                pos += len(separator)
             else:
                 return
         
@@ -1842,27 +2072,38 @@ class GLLParser:
         return self._extract_with_disambig(sppf, set())
     
     def _extract_with_disambig(self, sppf: SPPFNode, visited: set[int]) -> ParseTree:
-        """Extract parse tree with disambiguation rules applied."""
-        node_id = id(sppf)
-        if node_id in visited:
-            # Cycle detected - return leaf node to break recursion
-            return ParseTree(sppf.label, sppf.start, sppf.end, [])
+        """
+        Extract parse tree with disambiguation rules applied.
         
-        if not sppf.families:
-            # Leaf node
+        Walks the SPPF with an explicit stack of (node, children to extract, extracted children)
+        frames, so deep chains like long repeat[char[...]] runs don't hit the recursion limit.
+        `visited` holds the ids of the nodes on the current path, to break cycles.
+        """
+        if id(sppf) in visited or not sppf.families:
+            # Cycle or leaf node
             return ParseTree(sppf.label, sppf.start, sppf.end, [])
         
-        visited.add(node_id)
-        
         # Apply disambiguation to select best family
-        best_family = self._select_best_family(sppf)
-        
-        # Recursively extract children
-        children = [self._extract_with_disambig(child, visited) for child in best_family.children]
-        
-        visited.remove(node_id)  # Allow node in different branches
-        
-        return ParseTree(sppf.label, sppf.start, sppf.end, children)
+        visited.add(id(sppf))
+        stack = [(sppf, self._select_best_family(sppf).children, [])]
+        while True:
+            node, pending, children = stack[-1]
+            if len(children) < len(pending):
+                child = pending[len(children)]
+                if id(child) in visited or not child.families:
+                    # Cycle detected (return leaf node to break recursion) or leaf node
+                    children.append(ParseTree(child.label, child.start, child.end, []))
+                else:
+                    visited.add(id(child))
+                    stack.append((child, self._select_best_family(child).children, []))
+                continue
+            
+            stack.pop()
+            visited.remove(id(node))  # Allow node in different branches
+            tree = ParseTree(node.label, node.start, node.end, children)
+            if not stack:
+                return tree
+            stack[-1][2].append(tree)
     
     def _select_best_family(self, sppf: SPPFNode) -> PackedNode:
         """Select the best packed node based on disambiguation rules."""
@@ -1895,22 +2136,25 @@ class GLLParser:
         # For union/choice disambiguation, we need to look at the child's label
         # to determine which alternative was actually chosen
         effective_rule = rule_name
+        priority_scores = self._priority_scores
         if family.children and len(family.children) == 1:
             child = family.children[0]
             # If the child's label is in the priority list, use that for disambiguation
-            if child.label in [p for p in self.disambig.priority]:
+            if child.label in priority_scores:
                 effective_rule = child.label
         
         # For sequence nodes (like Expr+"+"+Expr), look up the enclosing rule
         # using the body_to_rule map
-        if effective_rule not in self.disambig.associativity and effective_rule not in self.disambig.priority:
+        if effective_rule not in self.disambig.associativity and effective_rule not in priority_scores:
             # Try to find the rule that has this as its body
             mapped_rule = self.grammar.body_to_rule.get(parent.label)
             if mapped_rule:
                 effective_rule = mapped_rule
         
         # Priority score - use effective_rule for disambiguation
-        priority = self.disambig.get_priority(effective_rule)
+        priority = priority_scores.get(effective_rule)
+        if priority is None:
+            priority = self.disambig.get_priority(effective_rule)
         
         # Associativity score - also use effective_rule
         assoc = self.disambig.get_associativity(effective_rule)
@@ -1941,7 +2185,7 @@ class GLLParser:
 # Parse Tree and Result Hydration
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class ParseTree:
     """A concrete parse tree node."""
     label: str
@@ -1960,19 +2204,19 @@ class ParseTree:
         return input_str[self.start:self.end]
     
     def find_captures(self) -> dict[str, list[ParseTree]]:
-        """Find all capture nodes (labels starting with ':')."""
+        """Find all capture nodes (labels starting with ':'), in pre-order."""
         captures: dict[str, list[ParseTree]] = {}
-        self._collect_captures(captures)
+        # Explicit stack instead of recursion; children are pushed reversed to keep pre-order
+        stack: list[ParseTree] = [self]
+        while stack:
+            node = stack.pop()
+            if node.label.startswith(':'):
+                name = node.label[1:]
+                if name not in captures:
+                    captures[name] = []
+                captures[name].append(node)
+            stack.extend(reversed(node.children))
         return captures
-    
-    def _collect_captures(self, captures: dict[str, list[ParseTree]]) -> None:
-        if self.label.startswith(':'):
-            name = self.label[1:]
-            if name not in captures:
-                captures[name] = []
-            captures[name].append(self)
-        for child in self.children:
-            child._collect_captures(captures)
 
 
 # =============================================================================
@@ -2,6 +2,8 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from enum import Enum, auto
 import ast
+import os
+import sys
 
 
 class CaptureKind(Enum):
@@ -36,6 +38,11 @@ class SourceKey:
 @dataclass
 class GrammarLiteral:
     value: str
+    # Quoted form used as the SPPF/parse-tree label, computed once instead of per match
+    label: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.label = f'"{self.value}"'
 
     def __str__(self) -> str:
         if not self.value:
@@ -47,6 +54,11 @@ class GrammarLiteral:
 @dataclass
 class GrammarCharClass:
     pattern: str  # e.g. "a-zA-Z0-9"
+    # Bracketed form used as the SPPF/parse-tree label, computed once instead of per matched character
+    label: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.label = f'[{self.pattern}]'
 
     def __str__(self) -> str:
         return f'[{self.pattern}]'
@@ -170,8 +182,24 @@ GrammarElement = (
 _registry_by_location: dict[SourceKey, GrammarRule] = {}
 _registry_by_name: dict[str, list[GrammarRule]] = {}
 
+# Frames from these files are wrappers when looking for the caller of get_all_rules
+_WRAPPER_FILES = frozenset(
+    os.path.join(os.path.dirname(__file__), name) for name in ('grammar.py', 'dsl.py')
+)
+
+
+# Bumped on every registry change, so work derived from the registry can be cached against it
+_registry_version = 0
+
+
+def registry_version() -> int:
+    """Return a counter that changes whenever rules are registered or cleared."""
+    return _registry_version
+
 
 def register_rule(rule: GrammarRule) -> None:
+    global _registry_version
+    _registry_version += 1
     key = SourceKey(rule.source_file, rule.source_line)
     _registry_by_location[key] = rule
     
@@ -241,8 +269,6 @@ def get_all_rules(
     Pass source_file to get rules from a specific file.
     Pass source_files to get rules from multiple specific files.
     """
-    import inspect
-    
     # Auto-register any RuleUnion objects from caller's scope
     from .dsl import _auto_register_unions
     _auto_register_unions()
@@ -257,34 +283,31 @@ def get_all_rules(
         return [r for r in _registry_by_location.values() if r.source_file == source_file]
     
     # Get caller's filename
-    frame = inspect.currentframe()
-    try:
-        caller = frame.f_back
-        # Walk up past any wrapper frames in grammar/dsl
-        while caller:
-            filename = caller.f_code.co_filename
-            if 'grammar.py' not in filename and 'dsl.py' not in filename:
-                break
-            caller = caller.f_back
-        
-        if not caller:
-            return list(_registry_by_location.values())
-        
-        caller_file = caller.f_code.co_filename
-    finally:
-        del frame
+    caller = sys._getframe(1)
+    # Walk up past any wrapper frames in grammar/dsl
+    while caller and caller.f_code.co_filename in _WRAPPER_FILES:
+        caller = caller.f_back
+    
+    if not caller:
+        return list(_registry_by_location.values())
+    
+    caller_file = caller.f_code.co_filename
     
     # Filter to rules from caller's file
     return [r for r in _registry_by_location.values() if r.source_file == caller_file]
 
 
 def clear_registry() -> None:
+    global _registry_version
+    _registry_version += 1
     _registry_by_location.clear()
     _registry_by_name.clear()
 
 
 def clear_registry_for_file(source_file: str) -> None:
     """Clear only rules from a specific source file."""
+    global _registry_version
+    _registry_version += 1
     # Remove from location registry
     keys_to_remove = [k for k, v in _registry_by_location.items() if v.source_file == source_file]
     for k in keys_to_remove:
@@ -361,6 +384,19 @@ def _flatten_bitor(node: ast.expr, source_file: str, source_line: int) -> list[G
     return [_ast_to_grammar(node, source_file, source_line)]
 
 
+# One shared GrammarCharClass per pattern (char class elements are never mutated)
+# The pattern is kept verbatim rather than normalized, since it is also the element's label
+_char_classes: dict[str, GrammarCharClass] = {}
+
+
+def _intern_char_class(pattern: str) -> GrammarCharClass:
+    """Get the shared GrammarCharClass for a pattern, creating it on first use."""
+    char_class = _char_classes.get(pattern)
+    if char_class is None:
+        char_class = _char_classes[pattern] = GrammarCharClass(pattern)
+    return char_class
+
+
 def _parse_subscript(node: ast.Subscript, source_file: str, source_line: int) -> GrammarElement:
     """Parse subscript expressions like char['a-z'], repeat[T, at_least[1]], etc."""
     
@@ -384,8 +420,8 @@ def _parse_subscript(node: ast.Subscript, source_file: str, source_line: int) ->
     # char['a-zA-Z']
     if base_name == 'char':
         if args and isinstance(args[0], ast.Constant) and isinstance(args[0].value, str):
-            return GrammarCharClass(args[0].value)
-        return GrammarCharClass("")
+            return _intern_char_class(args[0].value)
+        return _intern_char_class("")
     
     # repeat[T, modifiers...]
     if base_name == 'repeat':
@@ -706,7 +742,7 @@ def compute_capture_descriptor(
 
 def _build_grammar(
     name: str,
-    sequence: list[tuple],
+    sequence: tuple[tuple, ...],
     source_file: str,
     source_line: int,
     rule_unions: dict[str, list[str]] | None = None,
@@ -714,7 +750,7 @@ def _build_grammar(
     """
     Build a GrammarRule from the collected sequence of expressions and declarations.
     
-    sequence is a list of tuples like:
+    sequence is a tuple of tuples like:
         ("expr", "literal string")
         ("decl", "field_name", "annotation_text")
     